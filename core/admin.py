@@ -1,7 +1,10 @@
 from django.contrib import admin
-from .models import Portfolio, Trade, Holding
+from .models import Portfolio, Trade, TradeImport, Holding, PriceBar, Symbol
 
 # Admin Site - Registration
 admin.site.register(Portfolio)
 admin.site.register(Trade)
-admin.site.register(Holding)
\ No newline at end of file
+admin.site.register(TradeImport)
+admin.site.register(Holding)
+admin.site.register(PriceBar)
+admin.site.register(Symbol)
\ No newline at end of file
@@ -0,0 +1,255 @@
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Portfolio, Trade, TradeImport, Holding
+from . import symbols
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+import csv, io, json
+
+FIELDS = ["timestamp", "symbol", "trade_type", "shares", "price"]
+BATCH_SIZE = 2000
+# An unfinished import older than this is assumed dead and discarded
+ABANDONED_AFTER = timedelta(hours=1)
+
+
+class LedgerError(ValueError):
+    pass
+
+
+# -----------------------------
+# IMPORT
+# -----------------------------
+def _records(stream, fmt):
+    """
+    Yield (line number, dict) from a binary CSV or JSONL stream, decoded as
+    UTF-8 line by line. The stream is rewound first and left open.
+    """
+    stream.seek(0)
+    lines = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    n = 0
+    try:
+        if fmt == "jsonl":
+            for n, line in enumerate(lines, start=1):
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise LedgerError(f"Line {n}: invalid JSON ({e.msg})")
+                    if not isinstance(record, dict):
+                        raise LedgerError(f"Line {n}: expected a JSON object")
+                    yield n, record
+        else:
+            reader = csv.DictReader(lines)
+            missing = set(FIELDS) - {"timestamp"} - set(reader.fieldnames or [])
+            if missing:
+                raise LedgerError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+            for row in reader:
+                n = reader.line_num
+                yield n, row
+    except UnicodeDecodeError:
+        raise LedgerError(f"Line {n + 1}: file is not UTF-8 text")
+    except csv.Error as e:
+        raise LedgerError(f"Line {n + 1}: {e}")
+    finally:
+        # Don't let the wrapper close the upload when it is collected
+        lines.detach()
+
+
+def _trade(portfolio, n, row):
+    """Validate one record and build an unsaved Trade."""
+    symbol = str(row.get("symbol") or "").strip().upper()
+    trade_type = str(row.get("trade_type") or "").strip().upper()
+
+    if not symbol or len(symbol) > 10:
+        raise LedgerError(f"Line {n}: invalid symbol {symbol!r}")
+    if trade_type not in ("BUY", "SELL"):
+        raise LedgerError(f"Line {n}: trade_type must be BUY or SELL")
+
+    try:
+        shares = Decimal(str(row.get("shares")))
+        price = Decimal(str(row.get("price")))
+        if not (shares.is_finite() and price.is_finite()):
+            raise InvalidOperation
+        shares = shares.quantize(Decimal("0.0001"))
+        price = price.quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise LedgerError(f"Line {n}: shares and price must be numbers")
+    if not (shares > 0 and price > 0):
+        raise LedgerError(f"Line {n}: shares and price must be positive")
+
+    timestamp = timezone.now()
+    if row.get("timestamp"):
+        try:
+            timestamp = parse_datetime(str(row["timestamp"]))
+        except ValueError:
+            timestamp = None
+        if timestamp is None:
+            raise LedgerError(f"Line {n}: invalid timestamp {row['timestamp']!r}")
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+
+    return Trade(
+        portfolio=portfolio,
+        symbol=symbol,
+        shares=shares,
+        price=price,
+        trade_type=trade_type,
+        timestamp=timestamp,
+    )
+
+
+def import_trades(portfolio, stream, fmt="csv"):
+    """
+    Import trades from a seekable binary CSV or JSONL stream in two passes.
+
+    The first pass validates every record, including its symbol (see
+    symbols.verify), and checks the resulting ledger against the trades
+    already stored, without writing anything. The second inserts in
+    batches of BATCH_SIZE, each committed on its own so no transaction (or
+    sqlite write lock) spans the whole file. The rows belong to a
+    TradeImport and stay out of every settled() query until one final
+    transaction marks it completed and rebuilds holdings and cash. On
+    failure the import and its rows are deleted; an import abandoned by a
+    dead worker is deleted by the next import for the portfolio.
+    Returns the number of trades imported.
+    """
+    TradeImport.objects.filter(
+        portfolio=portfolio, completed__isnull=True,
+        started__lt=timezone.now() - ABANDONED_AFTER,
+    ).delete()
+    if TradeImport.objects.filter(portfolio=portfolio, completed__isnull=True).exists():
+        raise LedgerError("Another import for this account is still running.")
+
+    positions, cash = _ledger_totals(portfolio)
+    held = set(positions)
+    index = symbols.get_index()
+    unlisted = {}
+    for n, row in _records(stream, fmt):
+        t = _trade(portfolio, n, row)
+        # As in the trade view, sells of a symbol the ledger already holds
+        # need no check; anything else outside the master is verified below
+        if not index.exists(t.symbol) and not (t.trade_type == "SELL" and t.symbol in held):
+            unlisted.setdefault(t.symbol, n)
+        sign = 1 if t.trade_type == "BUY" else -1
+        positions[t.symbol] = positions.get(t.symbol, Decimal("0")) + sign * t.shares
+        cash -= sign * t.shares * t.price
+
+    # One upstream check per distinct ticker, not per row
+    for symbol, n in sorted(unlisted.items(), key=lambda item: item[1]):
+        if not symbols.verify(symbol):
+            raise LedgerError(f"Line {n}: unknown symbol {symbol!r}")
+    _check(positions, cash)
+
+    record = TradeImport.objects.create(portfolio=portfolio)
+    count = 0
+    try:
+        batch = []
+        for n, row in _records(stream, fmt):
+            t = _trade(portfolio, n, row)
+            t.import_batch = record
+            batch.append(t)
+            if len(batch) >= BATCH_SIZE:
+                Trade.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        Trade.objects.bulk_create(batch)
+        count += len(batch)
+
+        with transaction.atomic():
+            record.completed = timezone.now()
+            record.save(update_fields=["completed"])
+            rebuild(portfolio)
+    except BaseException:
+        # Cascades to the rows inserted so far
+        record.delete()
+        raise
+
+    return count
+
+
+def _ledger_totals(portfolio):
+    """
+    Net shares per symbol and the resulting cash balance from the stored
+    trade ledger, with one aggregate query, starting from the default
+    opening balance.
+    """
+    totals = (
+        Trade.objects.settled().filter(portfolio=portfolio)
+        .values("symbol", "trade_type")
+        .annotate(total_shares=Sum("shares"), total_value=Sum(F("shares") * F("price")))
+    )
+
+    cash = Decimal(str(Portfolio._meta.get_field("cash_balance").default))
+    positions = {}
+    for t in totals:
+        sign = 1 if t["trade_type"] == "BUY" else -1
+        positions[t["symbol"]] = positions.get(t["symbol"], Decimal("0")) + sign * t["total_shares"]
+        cash -= sign * Decimal(str(t["total_value"]))
+    return positions, cash
+
+
+def _check(positions, cash):
+    oversold = sorted(s for s, shares in positions.items() if shares < 0)
+    if oversold:
+        raise LedgerError(f"Ledger sells more shares than it buys: {', '.join(oversold)}")
+    if cash < 0:
+        raise LedgerError("Ledger spends more cash than the account holds.")
+
+
+def rebuild(portfolio):
+    """Recompute holdings and cash from the trade ledger."""
+    positions, cash = _ledger_totals(portfolio)
+    _check(positions, cash)
+
+    Holding.objects.filter(portfolio=portfolio).delete()
+    Holding.objects.bulk_create([
+        Holding(portfolio=portfolio, symbol=symbol, shares=shares)
+        for symbol, shares in positions.items() if shares > 0
+    ])
+
+    portfolio.cash_balance = cash.quantize(Decimal("0.01"))
+    portfolio.save()
+
+
+# -----------------------------
+# EXPORT
+# -----------------------------
+class _Echo:
+    # csv.writer target that hands each formatted row straight back
+    def write(self, value):
+        return value
+
+
+async def export_lines(portfolio, fmt="csv"):
+    """
+    Async generator of CSV or JSONL text for the whole trade ledger, read
+    from the database in chunks so memory stays flat for any account size.
+    """
+    rows = (
+        Trade.objects.settled().filter(portfolio=portfolio)
+        .order_by("timestamp", "id")
+        .values(*FIELDS)
+        .aiterator(chunk_size=BATCH_SIZE)
+    )
+
+    writer = csv.writer(_Echo())
+    buffer = [] if fmt == "jsonl" else [writer.writerow(FIELDS)]
+
+    async for record in rows:
+        record["timestamp"] = record["timestamp"].isoformat()
+        record["shares"] = str(record["shares"])
+        record["price"] = str(record["price"])
+        if fmt == "jsonl":
+            buffer.append(json.dumps(record) + "\n")
+        else:
+            buffer.append(writer.writerow([record[f] for f in FIELDS]))
+
+        # One response chunk per database chunk, not one per row
+        if len(buffer) >= BATCH_SIZE:
+            yield "".join(buffer)
+            buffer = []
+
+    if buffer:
+        yield "".join(buffer)
@@ -0,0 +1,244 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from pathlib import Path
+import json, os, subprocess, sys, tempfile
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOG"]
+
+# Run inside a fresh interpreter at the root of the tree being measured, so
+# each row gets its own process (and its own peak RSS). Only Django, pandas,
+# yfinance and models present since the first release are used, so the same
+# worker runs against an older checkout.
+_WORKER = (
+    "import django, importlib.util, json, sys; "
+    "sys.path.insert(0, '.'); django.setup(); "
+    "spec = importlib.util.spec_from_file_location('bench', sys.argv[1]); "
+    "bench = importlib.util.module_from_spec(spec); spec.loader.exec_module(bench); "
+    "print(json.dumps(bench.measure(**json.loads(sys.argv[2]))))"
+)
+
+
+class _FakeTicker:
+    # Stand-in for yfinance.Ticker: a fixed upstream delay and a small frame.
+    # Patched at the yfinance level so old and new views both go through it.
+    latency = 0.0
+    frame = None
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, period="1mo"):
+        import time
+
+        time.sleep(self.latency)
+        return self.frame.copy()
+
+    @classmethod
+    def install(cls, latency):
+        import pandas as pd
+        import yfinance
+
+        index = pd.date_range(end=pd.Timestamp.today().normalize(), periods=60, freq="B")
+        cls.frame = pd.DataFrame({
+            "Close": [100.0 + i for i in range(60)],
+            "Volume": [1_000_000 + i for i in range(60)],
+        }, index=index)
+        cls.latency = latency
+        yfinance.Ticker = cls
+
+
+def _memory_kib(field):
+    # Resident set size from procfs; thread stacks count once touched
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _setup_user():
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from core.models import Portfolio, PortfolioSnapshot, Holding, Trade
+    from decimal import Decimal
+
+    # bulk_create skips post_save, whose handler differs between releases
+    user = User(username="bench")
+    user.set_password("bench")
+    User.objects.bulk_create([user])
+    user = User.objects.get(username="bench")
+    portfolio, _ = Portfolio.objects.get_or_create(user=user)
+
+    for symbol in SYMBOLS:
+        Holding.objects.create(portfolio=portfolio, symbol=symbol, shares=Decimal("10"))
+        Trade.objects.create(portfolio=portfolio, symbol=symbol, shares=Decimal("10"),
+                             price=Decimal("100"), trade_type="BUY")
+
+    # Pre-create today's snapshot and a single session so the timed
+    # requests are read-only and never contend on sqlite write locks
+    PortfolioSnapshot.objects.create(user=user, total_value=Decimal("100000"))
+    client = Client()
+    client.force_login(user)
+    return client.cookies
+
+
+def measure(mode, conns, threads, latency, path):
+    """
+    Time `conns` concurrent requests to `path` in this process and report
+    the peak resident memory they added. Runs in a worker process.
+    """
+    from django.db import connection
+    from django.test import Client, AsyncClient
+    from django.test.utils import setup_test_environment
+    from concurrent.futures import ThreadPoolExecutor
+    import asyncio, threading, time
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    _FakeTicker.install(latency)
+    cookies = _setup_user()
+
+    # One warm-up request so imports and template loading aren't counted
+    warm = Client()
+    warm.cookies = cookies
+    warm.get(path)
+
+    peak_threads = threading.active_count()
+
+    def track():
+        nonlocal peak_threads
+        peak_threads = max(peak_threads, threading.active_count())
+
+    baseline = _memory_kib("VmRSS")
+    try:
+        # Reset the high-water mark so only the timed run counts
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    started = time.perf_counter()
+
+    if mode == "wsgi":
+        # Each connection occupies a worker thread for the whole request
+        def one(_):
+            client = Client()
+            client.cookies = cookies
+            t0 = time.perf_counter()
+            client.get(path)
+            track()
+            return time.perf_counter() - t0
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            timings = list(pool.map(one, range(conns)))
+        in_flight = min(conns, threads)
+    else:
+        # All connections share one event loop
+        async def one():
+            client = AsyncClient()
+            client.cookies = cookies
+            t0 = time.perf_counter()
+            await client.get(path)
+            track()
+            return time.perf_counter() - t0
+
+        async def run_all():
+            return await asyncio.gather(*(one() for _ in range(conns)))
+
+        timings = asyncio.run(run_all())
+        in_flight = conns
+
+    return {
+        "timings": timings,
+        "elapsed": time.perf_counter() - started,
+        "in_flight": in_flight,
+        "rss_kib": max(_memory_kib("VmHWM") - baseline, 0),
+        "threads": peak_threads,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the dashboard under the ASGI handler (one event loop) with "
+        "the WSGI handler (a fixed pool of worker threads), using a fake "
+        "market-data backend with a fixed latency. The WSGI rows run a "
+        "checkout of --reference (by default the last commit before the "
+        "async views) in a temporary git worktree. Each row is measured in "
+        "its own process; memory is peak RSS, thread stacks included, per "
+        "request in flight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, nargs="+", default=[10, 50, 200])
+        parser.add_argument("--threads", type=int, default=8,
+                            help="WSGI worker threads (e.g. gunicorn --threads)")
+        parser.add_argument("--latency", type=float, default=0.2,
+                            help="Seconds each market-data fetch takes")
+        parser.add_argument("--path", default="/?symbol=AAPL&range=3mo")
+        parser.add_argument("--reference", default=None,
+                            help="Git revision served in wsgi mode; 'current' "
+                                 "runs this tree's views instead")
+
+    def handle(self, *args, **options):
+        root = Path(settings.BASE_DIR)
+        reference = options["reference"] or self._pre_async_revision(root)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            if reference == "current":
+                wsgi_root = root
+            else:
+                wsgi_root = Path(tmp) / "reference"
+                self._git(root, "worktree", "add", "--detach", str(wsgi_root), reference)
+
+            try:
+                self.stdout.write(f"wsgi: {reference}, asgi: current tree")
+                self.stdout.write(
+                    f"{'mode':<6}{'conns':>7}{'flight':>8}{'req/s':>10}{'p50 ms':>10}"
+                    f"{'p95 ms':>10}{'KiB/req':>10}{'threads':>9}"
+                )
+                for conns in options["connections"]:
+                    for mode, tree in (("wsgi", wsgi_root), ("asgi", root)):
+                        result = self._run_worker(tree, mode, conns, options)
+                        self._report(mode, conns, result)
+            finally:
+                if wsgi_root != root:
+                    self._git(root, "worktree", "remove", "--force", str(wsgi_root))
+
+    def _pre_async_revision(self, root):
+        # Parent of the commit that introduced the async market-data layer
+        added = self._git(root, "log", "--diff-filter=A", "--format=%H", "--", "core/market.py").split()
+        if not added:
+            raise CommandError("Can't find the pre-async revision; pass --reference.")
+        return f"{added[-1]}^"
+
+    def _git(self, root, *args):
+        result = subprocess.run(["git", "-C", str(root), *args], capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+        return result.stdout
+
+    def _run_worker(self, tree, mode, conns, options):
+        params = {
+            "mode": mode,
+            "conns": conns,
+            "threads": options["threads"],
+            "latency": options["latency"],
+            "path": options["path"],
+        }
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "trader.settings"))
+        result = subprocess.run(
+            [sys.executable, "-c", _WORKER, __file__, json.dumps(params)],
+            cwd=tree, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"{mode} worker failed:\n{result.stderr.strip()}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def _report(self, mode, conns, result):
+        timings = sorted(result["timings"])
+        p50 = timings[len(timings) // 2] * 1000
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000
+        self.stdout.write(
+            f"{mode:<6}{conns:>7}{result['in_flight']:>8}{conns / result['elapsed']:>10.1f}"
+            f"{p50:>10.0f}{p95:>10.0f}{result['rss_kib'] / result['in_flight']:>10.1f}"
+            f"{result['threads']:>9}"
+        )
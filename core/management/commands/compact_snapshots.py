@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from core import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold daily portfolio snapshots older than the retention window into "
+        "weekly/monthly rollups (run daily)."
+    )
+
+    def handle(self, *args, **options):
+        compacted = snapshots.compact()
+        self.stdout.write(f"Compacted {compacted} daily snapshots")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from core import symbols
+
+
+class Command(BaseCommand):
+    help = (
+        "Load or refresh the symbol master from a CSV (ticker,name,exchange,sector). "
+        "Running servers pick the changes up within symbols.RECHECK_SECONDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default=str(symbols.BUNDLED_FILE))
+
+    def handle(self, *args, **options):
+        count = symbols.load_file(options["path"])
+        self.stdout.write(f"Loaded {count} symbols from {options['path']}")
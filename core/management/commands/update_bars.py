@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from core import market, risk
+from core.models import Holding
+
+
+class Command(BaseCommand):
+    help = "Store the latest daily closes for every held symbol (run once a day after the close)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period", default="1mo",
+                            help="History to request for symbols that already have bars")
+
+    def handle(self, *args, **options):
+        symbols = sorted(set(Holding.objects.values_list("symbol", flat=True)))
+        missing, _ = risk.stale_symbols(symbols)
+
+        for symbol in symbols:
+            period = "1y" if symbol in missing else options["period"]
+            data = market.fetch_history(symbol, period)
+            added = risk.store_bars(symbol, data) if not data.empty else 0
+            self.stdout.write(f"{symbol}: {added} new bars")
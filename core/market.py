@@ -0,0 +1,28 @@
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+import yfinance as yf
+import asyncio
+
+# yfinance only offers a blocking API, so every in-flight fetch holds a
+# thread. A dedicated pool keeps these off the loop's small default executor.
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "MARKET_DATA_WORKERS", 32),
+    thread_name_prefix="market-data",
+)
+
+
+def fetch_history(symbol, period):
+    # Blocking yfinance call - only ever run this off the event loop
+    return yf.Ticker(symbol).history(period=period)
+
+
+async def afetch_history(symbol, period):
+    return await sync_to_async(
+        fetch_history, thread_sensitive=False, executor=_executor
+    )(symbol, period)
+
+
+async def afetch_many(requests):
+    """Fetch several (symbol, period) histories concurrently, in order."""
+    return await asyncio.gather(*(afetch_history(s, p) for s, p in requests))
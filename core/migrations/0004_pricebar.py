@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_portfoliosnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=10)),
+                ('date', models.DateField()),
+                ('close', models.DecimalField(decimal_places=4, max_digits=12)),
+            ],
+            options={
+                'unique_together': {('symbol', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_snapshotrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trade',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['portfolio', 'timestamp'], name='core_trade_portfol_755a0a_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-19 14:20
+
+import csv
+from pathlib import Path
+
+from django.db import migrations, models
+
+SYMBOLS_FILE = Path(__file__).resolve().parent.parent / 'data' / 'symbols.csv'
+
+
+def load_symbols(apps, schema_editor):
+    Symbol = apps.get_model('core', 'Symbol')
+    with open(SYMBOLS_FILE, newline='', encoding='utf-8') as f:
+        Symbol.objects.bulk_create([Symbol(**row) for row in csv.DictReader(f)])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_alter_trade_timestamp_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Symbol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=10, unique=True)),
+                ('name', models.CharField(max_length=200)),
+                ('exchange', models.CharField(max_length=20)),
+                ('sector', models.CharField(max_length=50)),
+            ],
+        ),
+        migrations.RunPython(load_symbols, migrations.RunPython.noop),
+    ]
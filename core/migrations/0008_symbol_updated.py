@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-19 15:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_symbol'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='symbol',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:40
+
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def _canonical(symbol):
+    return (symbol or '').strip().upper()
+
+
+def uppercase_symbols(apps, schema_editor):
+    """
+    Rows written before symbols were normalized may be lower or mixed case.
+    Trades are renamed in place. Holdings that collide on (portfolio,
+    symbol) once renamed are merged into one row holding the summed shares;
+    price bars that collide on (symbol, date) keep a single close.
+    """
+    Trade = apps.get_model('core', 'Trade')
+    Holding = apps.get_model('core', 'Holding')
+    PriceBar = apps.get_model('core', 'PriceBar')
+
+    for symbol in Trade.objects.values_list('symbol', flat=True).distinct():
+        if symbol != _canonical(symbol):
+            Trade.objects.filter(symbol=symbol).update(symbol=_canonical(symbol))
+
+    groups = defaultdict(list)
+    for holding in Holding.objects.order_by('id'):
+        groups[(holding.portfolio_id, _canonical(holding.symbol))].append(holding)
+    for (_, symbol), holdings in groups.items():
+        if len(holdings) == 1 and holdings[0].symbol == symbol:
+            continue
+        keep, *merged = holdings
+        shares = sum(h.shares for h in holdings)
+        Holding.objects.filter(id__in=[h.id for h in merged]).delete()
+        if shares > 0:
+            keep.symbol = symbol
+            keep.shares = shares
+            keep.save(update_fields=['symbol', 'shares'])
+        else:
+            keep.delete()
+
+    for symbol in PriceBar.objects.values_list('symbol', flat=True).distinct():
+        canonical = _canonical(symbol)
+        if symbol == canonical:
+            continue
+        bars = PriceBar.objects.filter(symbol=symbol)
+        bars.filter(date__in=PriceBar.objects.filter(symbol=canonical).values('date')).delete()
+        bars.update(symbol=canonical)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_tradeimport_trade_import_batch'),
+    ]
+
+    operations = [
+        migrations.RunPython(uppercase_symbols, migrations.RunPython.noop),
+    ]
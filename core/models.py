@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 from decimal import Decimal
 
 @receiver(post_save, sender=User)
@@ -24,6 +25,52 @@ class PortfolioSnapshot(models.Model):
     def __str__(self):
         return f"{ self.user.username } - {self.date } - { self.total_value }"
 
+
+class SnapshotRollup(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    period = models.CharField(
+        max_length=1,
+        choices=[
+            ('W', 'Weekly'),
+            ('M', 'Monthly'),
+        ]
+    )
+    start = models.DateField()
+    open = models.DecimalField(max_digits=15, decimal_places=2)
+    high = models.DecimalField(max_digits=15, decimal_places=2)
+    low = models.DecimalField(max_digits=15, decimal_places=2)
+    close = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        unique_together = ('user', 'period', 'start')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.period} {self.start} - {self.close}"
+
+class TradeImport(models.Model):
+    """
+    One bulk import. Its trades are inserted in several transactions and
+    only count once `completed` is set, in the same transaction that
+    rebuilds holdings and cash. Deleting an unfinished import removes the
+    trades it left behind.
+    """
+    portfolio = models.ForeignKey(Portfolio, on_delete=models.CASCADE)
+    started = models.DateTimeField(auto_now_add=True)
+    completed = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        state = "completed" if self.completed else "unfinished"
+        return f"{self.portfolio} - import {self.started:%Y-%m-%d %H:%M} ({state})"
+
+
+class TradeQuerySet(models.QuerySet):
+    def settled(self):
+        """Leave out trades from imports that haven't finished."""
+        return self.filter(
+            models.Q(import_batch__isnull=True) | models.Q(import_batch__completed__isnull=False)
+        )
+
+
 class Trade(models.Model):
     portfolio = models.ForeignKey(Portfolio, on_delete=models.CASCADE)
     symbol = models.CharField(max_length=10)
@@ -36,7 +83,16 @@ class Trade(models.Model):
             ('SELL', 'Sell'),
         ]
     )
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, so imported history keeps its original timestamps
+    timestamp = models.DateTimeField(default=timezone.now)
+    import_batch = models.ForeignKey(TradeImport, null=True, blank=True, on_delete=models.CASCADE)
+
+    objects = TradeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['portfolio', 'timestamp']),
+        ]
 
     def __str__(self):
         return f"{self.trade_type} {self.shares} {self.symbol} @ {self.price}"
@@ -51,4 +107,28 @@ class Holding(models.Model):
         unique_together = ('portfolio', 'symbol')
 
     def __str__(self):
-        return f"{self.symbol}: {self.shares} shares"
\ No newline at end of file
+        return f"{self.symbol}: {self.shares} shares"
+
+class PriceBar(models.Model):
+    symbol = models.CharField(max_length=10)
+    date = models.DateField()
+    close = models.DecimalField(max_digits=12, decimal_places=4)
+
+    class Meta:
+        unique_together = ('symbol', 'date')
+
+    def __str__(self):
+        return f"{self.symbol} {self.date}: {self.close}"
+
+
+
+class Symbol(models.Model):
+    ticker = models.CharField(max_length=10, unique=True)
+    name = models.CharField(max_length=200)
+    exchange = models.CharField(max_length=20)
+    sector = models.CharField(max_length=50)
+    # Bumped on every save so other processes notice edits to the master
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.ticker} - {self.name}"
\ No newline at end of file
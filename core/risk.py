@@ -0,0 +1,255 @@
+from django.core.cache import cache
+from django.db.models import Count, Max
+from .models import Holding, PriceBar
+from datetime import date, timedelta
+from decimal import Decimal
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, Holiday, GoodFriday, USMartinLutherKingJr, USPresidentsDay,
+    USMemorialDay, USLaborDay, USThanksgivingDay, nearest_workday, sunday_to_monday,
+)
+from statistics import NormalDist
+import hashlib
+import numpy as np
+
+LOOKBACK_DAYS = 252          # trading days of returns used for every estimate
+CONFIDENCE_LEVELS = (0.95, 0.99)
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class ExchangeHolidayCalendar(AbstractHolidayCalendar):
+    """Full-day closures shared by NYSE, NASDAQ and NYSE American."""
+    rules = [
+        # A Saturday New Year's Day is not observed on the Friday before
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def _cache_key(portfolio, holdings):
+    """
+    Key a risk summary on everything it is computed from: positions, cash
+    and the stored bars of the held symbols. Any trade, import or new bar,
+    in any process, yields a new key, so a per-process cache can never
+    serve a stale result.
+    """
+    bars = PriceBar.objects.filter(symbol__in=[h.symbol for h in holdings]).aggregate(
+        count=Count("id"), latest=Max("date")
+    )
+    state = repr((
+        [(h.symbol, str(h.shares)) for h in holdings],
+        str(portfolio.cash_balance),
+        bars["count"],
+        bars["latest"],
+    ))
+    return f"risk:portfolio:{portfolio.id}:{hashlib.sha1(state.encode()).hexdigest()}"
+
+
+def _checked_key(symbol):
+    return f"risk:checked:{symbol}"
+
+
+# -----------------------------
+# DAILY BARS
+# -----------------------------
+def last_session(today=None):
+    """Most recent fully completed trading day before `today`."""
+    today = today or date.today()
+    holidays = ExchangeHolidayCalendar().holidays(start=today - timedelta(days=31), end=today)
+    return date.fromisoformat(str(np.busday_offset(
+        today, -1, roll="forward", holidays=holidays.values.astype("datetime64[D]")
+    )))
+
+
+def mark_checked(symbol):
+    """
+    Record that a backfill for `symbol` brought nothing new, so
+    `stale_symbols` leaves it alone until the next session completes. This
+    covers symbols the data source can't serve and unscheduled closures
+    the holiday calendar doesn't know about.
+    """
+    cache.set(_checked_key(symbol), last_session(), CACHE_TIMEOUT)
+
+
+def stale_symbols(symbols):
+    """
+    Split symbols into (no bars at all, bars older than the last session),
+    leaving out any already checked since that session.
+    """
+    cutoff = last_session()
+    checked = cache.get_many([_checked_key(s) for s in symbols])
+    symbols = [s for s in symbols if checked.get(_checked_key(s)) != cutoff]
+
+    latest = dict(
+        PriceBar.objects.filter(symbol__in=symbols)
+        .values("symbol").annotate(latest=Max("date"))
+        .values_list("symbol", "latest")
+    )
+
+    missing = [s for s in symbols if s not in latest]
+    stale = [s for s in symbols if s in latest and latest[s] < cutoff]
+    return missing, stale
+
+
+def store_bars(symbol, data):
+    """
+    Save completed daily closes from a yfinance history frame. Returns the
+    number of new bars.
+    """
+    today = date.today()
+    closes = {
+        d.date(): Decimal(str(round(float(c), 4)))
+        for d, c in zip(data.index, data["Close"])
+        if d.date() < today and not np.isnan(c)   # skip today's partial bar
+    }
+    if not closes:
+        return 0
+
+    existing = set(
+        PriceBar.objects.filter(symbol=symbol, date__in=list(closes))
+        .values_list("date", flat=True)
+    )
+    new_bars = [
+        PriceBar(symbol=symbol, date=d, close=c)
+        for d, c in closes.items() if d not in existing
+    ]
+    PriceBar.objects.bulk_create(new_bars, ignore_conflicts=True)
+    return len(new_bars)
+
+
+def returns_matrix(symbols, lookback=LOOKBACK_DAYS):
+    """
+    Daily simple returns as a (days x symbols) array, using only the dates
+    on which every symbol has a close. Symbols with no bars in the window
+    are dropped rather than emptying the matrix. Returns
+    (symbols, dates, returns, last_closes) for the symbols kept.
+    """
+    since = date.today() - timedelta(days=int(lookback * 1.6) + 10)
+    rows = list(
+        PriceBar.objects.filter(symbol__in=symbols, date__gte=since)
+        .values_list("date", "symbol", "close")
+    )
+    present = {r[1] for r in rows}
+    symbols = [s for s in symbols if s in present]
+    if not rows:
+        return symbols, [], np.empty((0, 0)), np.zeros(0)
+
+    dates = sorted({r[0] for r in rows})
+    date_idx = {d: i for i, d in enumerate(dates)}
+    sym_idx = {s: j for j, s in enumerate(symbols)}
+
+    closes = np.full((len(dates), len(symbols)), np.nan)
+    closes[
+        [date_idx[r[0]] for r in rows],
+        [sym_idx[r[1]] for r in rows],
+    ] = [float(r[2]) for r in rows]
+
+    complete = ~np.isnan(closes).any(axis=1)
+    closes = closes[complete][-(lookback + 1):]
+    dates = [d for d, keep in zip(dates, complete) if keep][-(lookback + 1):]
+
+    if not len(closes):
+        return symbols, [], np.empty((0, len(symbols))), np.zeros(len(symbols))
+
+    returns = closes[1:] / closes[:-1] - 1
+    return symbols, dates[1:], returns, closes[-1]
+
+
+# -----------------------------
+# RISK METRICS
+# -----------------------------
+def compute_risk(symbols, values, returns, total_value):
+    """
+    Covariance/correlation, historical and parametric VaR/CVaR, and each
+    position's contribution to portfolio volatility.
+
+    `values` are position market values in dollars and `returns` is the
+    (days x symbols) matrix from `returns_matrix`. Dollar figures are one-day
+    losses; percentages are of `total_value` (cash included).
+    """
+    values = np.asarray(values, dtype=float)
+    cov = np.atleast_2d(np.cov(returns, rowvar=False))
+    vol = np.sqrt(np.diag(cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.where(np.outer(vol, vol) > 0, cov / np.outer(vol, vol), 0.0)
+
+    pnl = returns @ values                     # one dollar P&L per historical day
+    mu = returns.mean(axis=0) @ values
+    sigma = float(np.sqrt(values @ cov @ values))
+
+    var = {}
+    for level in CONFIDENCE_LEVELS:
+        alpha = 1 - level
+        hist_var = -np.percentile(pnl, alpha * 100)
+        tail = pnl[pnl <= -hist_var]
+        hist_cvar = -tail.mean() if tail.size else hist_var
+
+        z = NormalDist().inv_cdf(alpha)
+        param_var = -(mu + z * sigma)
+        param_cvar = -(mu - sigma * NormalDist().pdf(z) / alpha)
+
+        var[f"{int(level * 100)}"] = {
+            "historical_var": float(hist_var),
+            "historical_cvar": float(hist_cvar),
+            "parametric_var": float(param_var),
+            "parametric_cvar": float(param_cvar),
+        }
+
+    for figures in var.values():
+        for key in list(figures):
+            figures[f"{key}_pct"] = figures[key] / total_value * 100 if total_value else 0.0
+
+    # Euler decomposition: contributions sum to portfolio sigma
+    contribution = values * (cov @ values) / sigma if sigma > 0 else np.zeros_like(values)
+
+    return {
+        "symbols": list(symbols),
+        "volatility": vol.tolist(),
+        "covariance": cov.tolist(),
+        "correlation": corr.tolist(),
+        "portfolio_volatility": sigma,
+        "var": var,
+        "risk_contribution": contribution.tolist(),
+        "risk_contribution_pct": (contribution / sigma * 100 if sigma > 0 else contribution).tolist(),
+    }
+
+
+def portfolio_risk(portfolio):
+    """
+    Cached risk summary for `portfolio`, with positions valued at their last
+    stored close. The cache key changes with the holdings, cash and bars.
+    """
+    holdings = list(Holding.objects.filter(portfolio=portfolio).order_by("symbol"))
+    key = _cache_key(portfolio, holdings)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    shares = {h.symbol: float(h.shares) for h in holdings}
+    symbols, dates, returns, last_closes = returns_matrix(list(shares))
+    # Holdings with no stored closes can't be valued or modelled here
+    excluded = [s for s in shares if s not in symbols]
+
+    values = last_closes * np.array([shares[s] for s in symbols])
+    total_value = float(portfolio.cash_balance) + float(values.sum())
+
+    if len(dates) < 2:
+        result = {"symbols": symbols, "observations": len(dates), "var": {}}
+    else:
+        result = compute_risk(symbols, values, returns, total_value)
+        result["observations"] = len(dates)
+        result["values"] = values.tolist()
+        result["total_value"] = total_value
+        result["start"] = dates[0].isoformat()
+        result["end"] = dates[-1].isoformat()
+    result["excluded"] = excluded
+
+    cache.set(key, result, CACHE_TIMEOUT)
+    return result
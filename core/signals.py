@@ -6,4 +6,4 @@ from .models import Portfolio
 @receiver(post_save, sender=User)
 def create_portfolio(sender, instance, created, **kwargs):
     if created:
-        Portfolio.objects.create(User=instance)
\ No newline at end of file
+        Portfolio.objects.get_or_create(user=instance)
\ No newline at end of file
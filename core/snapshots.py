@@ -0,0 +1,214 @@
+from django.db import transaction
+from .models import PortfolioSnapshot, SnapshotRollup
+from datetime import date, timedelta
+
+# Daily rows older than this are folded into weekly and monthly rollups.
+# Kept a little over a year so YTD and 1-year returns stay exact.
+DAILY_RETENTION_DAYS = 400
+# Weekly rollups older than this are dropped; monthly ones are kept forever.
+WEEKLY_RETENTION_DAYS = 3 * 365
+# Maximum number of points sent to the performance chart
+POINT_BUDGET = 250
+
+RANGES = {
+    "1m": 30,
+    "3m": 91,
+    "6m": 182,
+    "1y": 365,
+    "3y": 3 * 365,
+    "5y": 5 * 365,
+    "all": None,
+}
+
+
+def _bucket_start(day, period):
+    if period == "W":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _bucket_end(start, period):
+    if period == "W":
+        return start + timedelta(days=6)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def _merge(buckets, start, o, h, l, c):
+    """Fold an OHLC observation into `buckets`, assuming chronological order."""
+    if start in buckets:
+        b = buckets[start]
+        b[1] = max(b[1], h)
+        b[2] = min(b[2], l)
+        b[3] = c
+    else:
+        buckets[start] = [o, h, l, c]
+
+
+# -----------------------------
+# COMPACTION
+# -----------------------------
+def compact(today=None):
+    """
+    Roll daily snapshots past the retention window into weekly and monthly
+    OHLC rows, then delete them. Safe to run repeatedly: a bucket split
+    across two runs is merged into the existing rollup row.
+    Returns the number of daily rows compacted.
+    """
+    today = today or date.today()
+    daily_cutoff = today - timedelta(days=DAILY_RETENTION_DAYS)
+    weekly_cutoff = today - timedelta(days=WEEKLY_RETENTION_DAYS)
+
+    old = PortfolioSnapshot.objects.filter(date__lt=daily_cutoff)
+    compacted = 0
+
+    for user_id in old.values_list("user_id", flat=True).distinct():
+        with transaction.atomic():
+            rows = list(old.filter(user_id=user_id).order_by("date").values_list("date", "total_value"))
+
+            for period in ("W", "M"):
+                buckets = {}
+                for day, value in rows:
+                    _merge(buckets, _bucket_start(day, period), value, value, value, value)
+
+                existing = {
+                    r.start: r for r in SnapshotRollup.objects.filter(
+                        user_id=user_id, period=period, start__in=list(buckets)
+                    )
+                }
+                new_rows = []
+                for start, (o, h, l, c) in buckets.items():
+                    r = existing.get(start)
+                    if r:
+                        # The stored rollup covers earlier days of the bucket
+                        r.high, r.low, r.close = max(r.high, h), min(r.low, l), c
+                    else:
+                        new_rows.append(SnapshotRollup(
+                            user_id=user_id, period=period, start=start,
+                            open=o, high=h, low=l, close=c,
+                        ))
+                SnapshotRollup.objects.bulk_create(new_rows)
+                SnapshotRollup.objects.bulk_update(existing.values(), ["high", "low", "close"])
+
+            old.filter(user_id=user_id).delete()
+            compacted += len(rows)
+
+    SnapshotRollup.objects.filter(period="W", start__lt=_bucket_start(weekly_cutoff, "W")).delete()
+    return compacted
+
+
+# -----------------------------
+# READING HISTORY
+# -----------------------------
+def performance_series(user, perf_range="all", today=None):
+    """
+    Chart points for `perf_range` as (dates, closes, highs, lows, period),
+    at the coarsest tier that still has the detail the window needs: daily
+    inside the daily retention window, weekly inside the weekly one, else
+    monthly. On the daily tier highs and lows equal the closes; otherwise
+    they are each period's extremes, and each point is dated by the last
+    day its period covers. Rows are read only for the requested window, so
+    cost stays flat as the account ages.
+    """
+    today = today or date.today()
+    days = RANGES.get(perf_range)
+
+    if days is None:
+        first = PortfolioSnapshot.objects.filter(user=user).order_by("date").values_list("date", flat=True).first()
+        first_rollup = SnapshotRollup.objects.filter(user=user).order_by("start").values_list("start", flat=True).first()
+        start = min(d for d in (first, first_rollup, today) if d is not None)
+    else:
+        start = today - timedelta(days=days)
+
+    if start >= today - timedelta(days=DAILY_RETENTION_DAYS):
+        period = None
+    elif start >= today - timedelta(days=WEEKLY_RETENTION_DAYS):
+        period = "W"
+    else:
+        period = "M"
+
+    daily = PortfolioSnapshot.objects.filter(user=user, date__gte=start).order_by("date")
+
+    if period is None:
+        rows = list(daily.values_list("date", "total_value"))
+        values = [float(v) for _, v in rows]
+        return [d for d, _ in rows], values, values, values, period
+
+    buckets = {}
+    ends = {}
+    rollups = SnapshotRollup.objects.filter(
+        user=user, period=period, start__gte=_bucket_start(start, period)
+    ).order_by("start")
+    for r in rollups:
+        _merge(buckets, r.start, r.open, r.high, r.low, r.close)
+        ends[r.start] = _bucket_end(r.start, period)
+
+    # Recent days are bucketed on the fly and merged into the same tier;
+    # the bucket still in progress is dated by its latest day
+    for day, value in daily.values_list("date", "total_value"):
+        bucket = _bucket_start(day, period)
+        _merge(buckets, bucket, value, value, value, value)
+        ends[bucket] = day
+
+    return (
+        [ends[b] for b in buckets],
+        [float(b[3]) for b in buckets.values()],
+        [float(b[1]) for b in buckets.values()],
+        [float(b[2]) for b in buckets.values()],
+        period,
+    )
+
+
+def value_on_or_after(user, day):
+    """
+    First recorded portfolio value on or after `day`, or None. Rollups hold
+    the oldest history, so the earliest of the first daily row and the first
+    rollup wins; a weekly rollup is preferred over a monthly one starting
+    the same day.
+    """
+    candidates = []
+
+    snap = PortfolioSnapshot.objects.filter(user=user, date__gte=day).order_by("date").first()
+    if snap:
+        candidates.append((snap.date, float(snap.total_value)))
+
+    rollup = SnapshotRollup.objects.filter(user=user, start__gte=day).order_by("start", "-period").first()
+    if rollup:
+        candidates.append((rollup.start, float(rollup.open)))
+
+    return min(candidates)[1] if candidates else None
+
+
+def lttb(values, threshold=POINT_BUDGET):
+    """
+    Largest-Triangle-Three-Buckets downsampling. Returns the indices of the
+    points to keep, always including the first and last.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    keep = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(values[next_start:next_end]) / (next_end - next_start)
+
+        best, best_area = None, -1
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs(
+                (a - avg_x) * (values[j] - values[a])
+                - (a - j) * (avg_y - values[a])
+            )
+            if area > best_area:
+                best, best_area = j, area
+
+        keep.append(best)
+        a = best
+
+    keep.append(n - 1)
+    return keep
@@ -0,0 +1,180 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from .models import Symbol
+from . import market
+from bisect import bisect_left
+from pathlib import Path
+import csv, re, threading, time
+
+BUNDLED_FILE = Path(__file__).resolve().parent / "data" / "symbols.csv"
+FIELDS = ["ticker", "name", "exchange", "sector"]
+# How often a process checks the table for edits made elsewhere (admin,
+# load_symbols, another worker)
+RECHECK_SECONDS = 60
+# How long a ticker the data source didn't recognise is rejected without
+# asking again
+MISSING_TIMEOUT = 60 * 60 * 24
+
+# Letters and digits, plus the share-class, index (^GSPC) and currency
+# (EURUSD=X) punctuation yfinance uses
+_TICKER = re.compile(r"^[A-Z0-9^][A-Z0-9.\-=]{0,9}$")
+
+_index = None
+_marker = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def normalize(symbol):
+    return (symbol or "").strip().upper()
+
+
+def valid_format(ticker):
+    return bool(_TICKER.match(ticker))
+
+
+class SymbolIndex:
+    """
+    Immutable in-memory view of the symbol master. Lookups are dict hits and
+    prefix searches are a bisect into sorted arrays, so typeahead never
+    touches the database or the network.
+    """
+
+    def __init__(self, rows):
+        self._rows = {r["ticker"]: r for r in rows}
+        self._tickers = sorted(self._rows)
+        self._names = sorted((r["name"].lower(), r["ticker"]) for r in rows)
+
+    def __len__(self):
+        return len(self._tickers)
+
+    def get(self, ticker):
+        return self._rows.get(normalize(ticker))
+
+    def exists(self, ticker):
+        return normalize(ticker) in self._rows
+
+    def sector(self, ticker):
+        row = self.get(ticker)
+        return row["sector"] if row else "Other"
+
+    def search(self, query, limit=10):
+        """Ticker-prefix matches first, then company-name-prefix matches."""
+        query = query.strip()
+        if not query:
+            return []
+
+        found = []
+        prefix = query.upper()
+        i = bisect_left(self._tickers, prefix)
+        while i < len(self._tickers) and len(found) < limit and self._tickers[i].startswith(prefix):
+            found.append(self._tickers[i])
+            i += 1
+
+        prefix = query.lower()
+        i = bisect_left(self._names, (prefix, ""))
+        while i < len(self._names) and len(found) < limit and self._names[i][0].startswith(prefix):
+            if self._names[i][1] not in found:
+                found.append(self._names[i][1])
+            i += 1
+
+        return [self._rows[t] for t in found]
+
+
+def _current_marker():
+    # Row count catches deletions; Symbol.updated catches inserts and edits
+    # made through save() or load_file (not bare queryset .update() calls)
+    marker = Symbol.objects.aggregate(count=Count("id"), updated=Max("updated"))
+    return marker["count"], marker["updated"]
+
+
+def cached_index():
+    """The built index, or None if nothing has built it yet or a recheck is due."""
+    if _index is not None and time.monotonic() - _checked_at < RECHECK_SECONDS:
+        return _index
+    return None
+
+
+def get_index():
+    """
+    The symbol index, rebuilt when the table has changed. The table is
+    checked at most once every RECHECK_SECONDS, so an edit in any process
+    reaches every other process within that interval.
+    """
+    global _index, _marker, _checked_at
+    if cached_index() is None:
+        with _lock:
+            if cached_index() is None:
+                marker = _current_marker()
+                if _index is None or marker != _marker:
+                    _index = SymbolIndex(list(Symbol.objects.values(*FIELDS)))
+                    _marker = marker
+                _checked_at = time.monotonic()
+    return _index
+
+
+def reset():
+    """Drop this process's index; other processes pick changes up on recheck."""
+    global _index
+    _index = None
+
+
+# -----------------------------
+# TICKERS OUTSIDE THE BUNDLED LIST
+# -----------------------------
+# The bundled file only covers common tickers. Anything else is checked
+# against the market-data source once: a hit is added to the master (so
+# every process sees it after its next recheck), a miss is remembered for
+# MISSING_TIMEOUT.
+def _missing_key(ticker):
+    return f"symbols:missing:{ticker}"
+
+
+def known_missing(ticker):
+    return cache.get(_missing_key(ticker)) is not None
+
+
+def record_check(ticker, found):
+    """Store the outcome of an upstream check for a ticker not in the master."""
+    if not found:
+        cache.set(_missing_key(ticker), True, MISSING_TIMEOUT)
+        return
+    Symbol.objects.get_or_create(
+        ticker=ticker, defaults={"name": ticker, "exchange": "", "sector": "Other"}
+    )
+    reset()
+
+
+def verify(ticker):
+    """
+    True if `ticker` is in the master or the market-data source knows it.
+    Blocking; the async views do the same with market.afetch_history.
+    """
+    if get_index().exists(ticker):
+        return True
+    if not valid_format(ticker) or known_missing(ticker):
+        return False
+    found = not market.fetch_history(ticker, "5d").empty
+    record_check(ticker, found)
+    return found
+
+
+def load_file(path=BUNDLED_FILE):
+    """Insert or update every row of a symbols CSV. Returns the row count."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [
+            Symbol(**{k: (normalize(v) if k == "ticker" else v.strip()) for k, v in row.items()})
+            for row in csv.DictReader(f)
+        ]
+
+    with transaction.atomic():
+        Symbol.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["ticker"],
+            update_fields=["name", "exchange", "sector", "updated"],
+        )
+
+    reset()
+    return len(rows)
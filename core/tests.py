@@ -1,3 +1,560 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.apps import apps
+from django.test import AsyncClient, TestCase
+from django.utils import timezone
+from asgiref.sync import async_to_sync
+from .models import Holding, Portfolio, PriceBar, PortfolioSnapshot, SnapshotRollup, Symbol, Trade, TradeImport
+from . import ledger, risk, snapshots, symbols
+from datetime import date, timedelta
+from decimal import Decimal
+from statistics import NormalDist
+from unittest import mock
+import asyncio, importlib, io
+import numpy as np
+import pandas as pd
 
-# Create your tests here.
+
+class RiskTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("alice", password="pw")
+        self.portfolio = self.user.portfolio
+
+    def _bars(self, symbol, closes):
+        start = date.today() - timedelta(days=len(closes) + 1)
+        PriceBar.objects.bulk_create([
+            PriceBar(symbol=symbol, date=start + timedelta(days=i), close=Decimal(str(c)))
+            for i, c in enumerate(closes)
+        ])
+
+    def test_var_and_cvar(self):
+        rng = np.random.default_rng(0)
+        returns = rng.normal(0.0005, 0.01, size=(500, 2))
+        values = np.array([6000.0, 4000.0])
+        result = risk.compute_risk(["AAA", "BBB"], values, returns, 20000.0)
+
+        pnl = returns @ values
+        hist_var = -np.percentile(pnl, 5)
+        figures = result["var"]["95"]
+        self.assertAlmostEqual(figures["historical_var"], hist_var)
+        self.assertAlmostEqual(figures["historical_cvar"], -pnl[pnl <= -hist_var].mean())
+        self.assertGreaterEqual(figures["historical_cvar"], figures["historical_var"])
+        self.assertAlmostEqual(figures["historical_var_pct"], hist_var / 20000.0 * 100)
+
+        mu = returns.mean(axis=0) @ values
+        sigma = result["portfolio_volatility"]
+        z = NormalDist().inv_cdf(0.05)
+        self.assertAlmostEqual(figures["parametric_var"], -(mu + z * sigma))
+        self.assertGreater(result["var"]["99"]["parametric_var"], figures["parametric_var"])
+
+    def test_risk_contributions_sum_to_sigma(self):
+        rng = np.random.default_rng(1)
+        returns = rng.normal(0, 0.02, size=(250, 3))
+        result = risk.compute_risk(["A", "B", "C"], [1000.0, 2500.0, 500.0], returns, 5000.0)
+
+        self.assertAlmostEqual(sum(result["risk_contribution"]), result["portfolio_volatility"])
+        self.assertAlmostEqual(sum(result["risk_contribution_pct"]), 100.0)
+
+    def test_symbols_without_bars_are_excluded(self):
+        self._bars("AAPL", [100 + i for i in range(30)])
+        self._bars("MSFT", [200 - i for i in range(30)])
+        for symbol in ("AAPL", "MSFT", "ZZZZ"):
+            Holding.objects.create(portfolio=self.portfolio, symbol=symbol, shares=Decimal("10"))
+
+        symbols, dates, returns, last_closes = risk.returns_matrix(["AAPL", "MSFT", "ZZZZ"])
+        self.assertEqual(symbols, ["AAPL", "MSFT"])
+        self.assertEqual(returns.shape, (29, 2))
+        self.assertEqual(last_closes.tolist(), [129.0, 171.0])
+
+        result = risk.portfolio_risk(self.portfolio)
+        self.assertEqual(result["symbols"], ["AAPL", "MSFT"])
+        self.assertEqual(result["excluded"], ["ZZZZ"])
+        self.assertEqual(result["observations"], 29)
+
+    def test_checked_symbols_are_not_refetched_until_next_session(self):
+        self._bars("AAPL", [100, 101])
+        self.assertEqual(risk.stale_symbols(["AAPL", "ZZZZ"])[0], ["ZZZZ"])
+
+        risk.mark_checked("ZZZZ")
+        self.assertEqual(risk.stale_symbols(["AAPL", "ZZZZ"])[0], [])
+
+        next_session = risk.last_session() + timedelta(days=1)
+        with mock.patch.object(risk, "last_session", return_value=next_session):
+            self.assertEqual(risk.stale_symbols(["AAPL", "ZZZZ"])[0], ["ZZZZ"])
+
+    def test_last_session_skips_exchange_holidays(self):
+        self.assertEqual(risk.last_session(date(2026, 11, 27)), date(2026, 11, 25))  # Thanksgiving
+        self.assertEqual(risk.last_session(date(2026, 11, 30)), date(2026, 11, 27))
+        self.assertEqual(risk.last_session(date(2026, 4, 6)), date(2026, 4, 2))      # Good Friday
+        self.assertEqual(risk.last_session(date(2026, 7, 6)), date(2026, 7, 2))      # July 4th observed on the 3rd
+        self.assertEqual(risk.last_session(date(2026, 6, 17)), date(2026, 6, 16))
+
+    def test_cached_result_follows_ledger_and_bars(self):
+        self._bars("AAPL", [100 + i for i in range(30)])
+        self._bars("MSFT", [200 - i for i in range(30)])
+        Holding.objects.create(portfolio=self.portfolio, symbol="AAPL", shares=Decimal("10"))
+
+        with mock.patch.object(risk, "returns_matrix", wraps=risk.returns_matrix) as computed:
+            risk.portfolio_risk(self.portfolio)
+            risk.portfolio_risk(self.portfolio)
+        self.assertEqual(computed.call_count, 1)
+
+        # Changes made elsewhere (another worker, a cron job) with no
+        # invalidation call still produce a fresh result
+        Holding.objects.create(portfolio=self.portfolio, symbol="MSFT", shares=Decimal("5"))
+        second = risk.portfolio_risk(self.portfolio)
+        self.assertEqual(second["symbols"], ["AAPL", "MSFT"])
+
+        PriceBar.objects.create(symbol="AAPL", date=date.today(), close=Decimal("150"))
+        PriceBar.objects.create(symbol="MSFT", date=date.today(), close=Decimal("160"))
+        third = risk.portfolio_risk(self.portfolio)
+        self.assertEqual(third["observations"], second["observations"] + 1)
+
+
+class SnapshotTests(TestCase):
+    TODAY = date(2026, 6, 30)
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pw")
+        # Six years of daily values, oldest first
+        self.history = {
+            self.TODAY - timedelta(days=i): Decimal(10000 + (2190 - i) * 5 + (i % 7) * 40)
+            for i in range(2190, -1, -1)
+        }
+        PortfolioSnapshot.objects.bulk_create([
+            PortfolioSnapshot(user=self.user, total_value=v) for v in self.history.values()
+        ])
+        # date is auto_now_add, so backdate the rows afterwards
+        for pk, day in zip(
+            PortfolioSnapshot.objects.filter(user=self.user).order_by("pk").values_list("pk", flat=True),
+            self.history,
+        ):
+            PortfolioSnapshot.objects.filter(pk=pk).update(date=day)
+
+    def _expected_rollups(self, period, cutoff):
+        buckets = {}
+        for day, value in self.history.items():
+            if day < cutoff:
+                snapshots._merge(buckets, snapshots._bucket_start(day, period), value, value, value, value)
+        return {start: tuple(b) for start, b in buckets.items()}
+
+    def _stored_rollups(self, period):
+        return {
+            r.start: (r.open, r.high, r.low, r.close)
+            for r in SnapshotRollup.objects.filter(user=self.user, period=period)
+        }
+
+    def test_compaction_is_idempotent_across_runs(self):
+        # A first run part-way through the week and month, then the real one
+        snapshots.compact(today=self.TODAY - timedelta(days=3))
+        snapshots.compact(today=self.TODAY)
+        monthly = self._stored_rollups("M")
+        weekly = self._stored_rollups("W")
+
+        daily_cutoff = self.TODAY - timedelta(days=snapshots.DAILY_RETENTION_DAYS)
+        self.assertEqual(monthly, self._expected_rollups("M", daily_cutoff))
+        weekly_cutoff = snapshots._bucket_start(
+            self.TODAY - timedelta(days=snapshots.WEEKLY_RETENTION_DAYS), "W"
+        )
+        self.assertEqual(weekly, {
+            start: b for start, b in self._expected_rollups("W", daily_cutoff).items()
+            if start >= weekly_cutoff
+        })
+        self.assertFalse(PortfolioSnapshot.objects.filter(date__lt=daily_cutoff).exists())
+
+        self.assertEqual(snapshots.compact(today=self.TODAY), 0)
+        self.assertEqual(self._stored_rollups("M"), monthly)
+        self.assertEqual(self._stored_rollups("W"), weekly)
+
+    def test_tier_selection(self):
+        snapshots.compact(today=self.TODAY)
+        latest = float(self.history[self.TODAY])
+
+        for perf_range, period in (("3m", None), ("1y", None), ("3y", "W"), ("5y", "M"), ("all", "M")):
+            dates, values, highs, lows, tier = snapshots.performance_series(self.user, perf_range, today=self.TODAY)
+            self.assertEqual(tier, period, perf_range)
+            self.assertEqual(values[-1], latest)
+            self.assertEqual(dates[-1], self.TODAY)
+            self.assertEqual(dates, sorted(dates))
+            self.assertTrue(all(lo <= v <= hi for v, hi, lo in zip(values, highs, lows)))
+
+        dates, values, highs, lows, _ = snapshots.performance_series(self.user, "3m", today=self.TODAY)
+        self.assertEqual(dates[0], self.TODAY - timedelta(days=91))
+        self.assertEqual(values, lows)
+
+        # Weekly points are dated by the Sunday ending their week
+        dates, _, _, _, _ = snapshots.performance_series(self.user, "3y", today=self.TODAY)
+        self.assertTrue(all(d.weekday() == 6 for d in dates[:-1]))
+
+    def test_monthly_points_carry_period_extremes(self):
+        snapshots.compact(today=self.TODAY)
+        dates, values, highs, lows, _ = snapshots.performance_series(self.user, "all", today=self.TODAY)
+
+        first_month = [v for d, v in self.history.items() if d.replace(day=1) == min(self.history).replace(day=1)]
+        self.assertEqual(dates[0], date(2020, 7, 31))
+        self.assertEqual((values[0], highs[0], lows[0]),
+                         (float(first_month[-1]), float(max(first_month)), float(min(first_month))))
+        self.assertLess(lows[0], values[0])
+
+    def test_value_on_or_after_reads_rollups(self):
+        snapshots.compact(today=self.TODAY)
+
+        day = self.TODAY - timedelta(days=600)
+        week = snapshots._bucket_start(day, "W")
+        if week < day:
+            week += timedelta(days=7)
+        self.assertEqual(snapshots.value_on_or_after(self.user, day), float(self.history[week]))
+
+        recent = self.TODAY - timedelta(days=30)
+        self.assertEqual(snapshots.value_on_or_after(self.user, recent), float(self.history[recent]))
+        self.assertIsNone(snapshots.value_on_or_after(self.user, self.TODAY + timedelta(days=1)))
+
+    def test_lttb_keeps_endpoints_within_budget(self):
+        values = [float(i % 50) for i in range(1000)]
+        values[500] = 500.0
+        keep = snapshots.lttb(values, threshold=100)
+
+        self.assertEqual(len(keep), 100)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertEqual(keep, sorted(set(keep)))
+        self.assertIn(500, keep)
+        self.assertEqual(snapshots.lttb(values[:40], threshold=100), list(range(40)))
+
+
+class LedgerImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        symbols.reset()
+        self.addCleanup(symbols.reset)
+        self.user = User.objects.create_user("alice", password="pw")
+        self.portfolio = self.user.portfolio
+
+    def _import(self, text, fmt="csv"):
+        return ledger.import_trades(self.portfolio, io.BytesIO(text.encode()), fmt)
+
+    def test_rebuilds_holdings_and_cash(self):
+        count = self._import(
+            "timestamp,symbol,trade_type,shares,price\n"
+            "2024-01-02T10:00:00,aapl,BUY,10,150\n"
+            "2024-01-03T10:00:00,MSFT,BUY,5,300.005\n"
+            "2024-02-01T10:00:00,AAPL,SELL,4,160\n"
+            "2024-02-02T10:00:00,MSFT,SELL,5,310\n"
+        )
+
+        self.assertEqual(count, 4)
+        self.assertEqual(
+            dict(Holding.objects.filter(portfolio=self.portfolio).values_list("symbol", "shares")),
+            {"AAPL": Decimal("6")},
+        )
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.cash_balance, Decimal("100000") - 1500 - Decimal("1500.00") + 640 + 1550)
+
+    def test_jsonl_adds_to_existing_ledger(self):
+        self._import('{"symbol": "AAPL", "trade_type": "BUY", "shares": "3", "price": "100"}\n', "jsonl")
+        self._import('{"symbol": "AAPL", "trade_type": "SELL", "shares": 1, "price": 120}\n\n', "jsonl")
+
+        self.assertEqual(Trade.objects.filter(portfolio=self.portfolio).count(), 2)
+        self.assertEqual(Holding.objects.get(portfolio=self.portfolio).shares, Decimal("2"))
+
+    def test_rejects_bad_records(self):
+        header = "timestamp,symbol,trade_type,shares,price\n"
+        bad = [
+            (header + ",AAPL,HOLD,1,100\n", "csv"),
+            (header + ",AAPL,BUY,NaN,100\n", "csv"),
+            (header + ",AAPL,BUY,Infinity,100\n", "csv"),
+            (header + ",AAPL,BUY,-1,100\n", "csv"),
+            (header + "2024-02-30T10:00:00,AAPL,BUY,1,100\n", "csv"),
+            (header + "yesterday,AAPL,BUY,1,100\n", "csv"),
+            ("symbol,shares,price\nAAPL,1,100\n", "csv"),
+            ("[1, 2]\n", "jsonl"),
+            ('"x"\n', "jsonl"),
+            ("{not json\n", "jsonl"),
+        ]
+        for text, fmt in bad:
+            with self.assertRaises(ledger.LedgerError, msg=text):
+                self._import(text, fmt)
+
+        with self.assertRaisesMessage(ledger.LedgerError, "not UTF-8"):
+            ledger.import_trades(self.portfolio, io.BytesIO(header.encode() + b",AAPL,BUY,1,\xff\n"))
+
+        self.assertFalse(Trade.objects.exists())
+
+    def test_rejects_oversold_or_overspent_ledger_without_writing(self):
+        header = "timestamp,symbol,trade_type,shares,price\n"
+        with self.assertRaisesMessage(ledger.LedgerError, "AAPL"):
+            self._import(header + ",AAPL,BUY,1,100\n,AAPL,SELL,2,100\n")
+        with self.assertRaisesMessage(ledger.LedgerError, "more cash"):
+            self._import(header + ",AAPL,BUY,1000,101\n")
+
+        self.assertFalse(Trade.objects.exists())
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.cash_balance, Decimal("100000"))
+
+    def test_imports_across_batches(self):
+        rows = "".join(f",AAPL,BUY,1,{1 + i % 7}\n" for i in range(ledger.BATCH_SIZE * 2 + 5))
+        count = self._import("timestamp,symbol,trade_type,shares,price\n" + rows)
+
+        self.assertEqual(count, ledger.BATCH_SIZE * 2 + 5)
+        self.assertEqual(Holding.objects.get(portfolio=self.portfolio).shares, count)
+
+    def test_failed_import_leaves_nothing_behind(self):
+        rows = "".join(",AAPL,BUY,1,10\n" for _ in range(ledger.BATCH_SIZE + 5))
+        with mock.patch.object(ledger, "rebuild", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self._import("timestamp,symbol,trade_type,shares,price\n" + rows)
+
+        self.assertFalse(Trade.objects.exists())
+        self.assertFalse(TradeImport.objects.exists())
+
+    def test_unfinished_import_is_invisible_and_discarded(self):
+        # What a worker that died during the insert pass leaves behind
+        Trade.objects.create(portfolio=self.portfolio, symbol="MSFT", shares=1, price=100, trade_type="BUY")
+        ledger.rebuild(self.portfolio)
+        dead = TradeImport.objects.create(portfolio=self.portfolio)
+        Trade.objects.create(portfolio=self.portfolio, symbol="AAPL", shares=5, price=10,
+                             trade_type="BUY", import_batch=dead)
+
+        self.assertEqual(list(Trade.objects.settled().values_list("symbol", flat=True)), ["MSFT"])
+        self.assertEqual(ledger._ledger_totals(self.portfolio)[0], {"MSFT": Decimal("1")})
+
+        async def export():
+            return "".join([chunk async for chunk in ledger.export_lines(self.portfolio)])
+        self.assertNotIn("AAPL", async_to_sync(export)())
+
+        header = "timestamp,symbol,trade_type,shares,price\n"
+        with self.assertRaisesMessage(ledger.LedgerError, "still running"):
+            self._import(header + ",AAPL,BUY,1,10\n")
+
+        TradeImport.objects.filter(pk=dead.pk).update(started=timezone.now() - ledger.ABANDONED_AFTER * 2)
+        self._import(header + ",AAPL,BUY,1,10\n")
+
+        self.assertFalse(TradeImport.objects.filter(pk=dead.pk).exists())
+        self.assertEqual(
+            dict(Holding.objects.filter(portfolio=self.portfolio).values_list("symbol", "shares")),
+            {"MSFT": Decimal("1"), "AAPL": Decimal("1")},
+        )
+
+    def test_rejects_unknown_symbols(self):
+        header = "timestamp,symbol,trade_type,shares,price\n"
+        empty = pd.DataFrame({"Close": []})
+        with mock.patch("core.market.fetch_history", return_value=empty) as fetch:
+            with self.assertRaisesMessage(ledger.LedgerError, "Line 3: unknown symbol 'ZZZZ'"):
+                self._import(header + ",AAPL,BUY,1,10\n,ZZZZ,BUY,1,10\n,ZZZZ,BUY,1,10\n")
+        # One upstream check per distinct ticker
+        fetch.assert_called_once_with("ZZZZ", "5d")
+        self.assertFalse(Trade.objects.exists())
+
+        # A position in a symbol no longer in the master can still be sold
+        Trade.objects.create(portfolio=self.portfolio, symbol="ZZZZ", shares=2, price=10, trade_type="BUY")
+        self.assertEqual(self._import(header + ",ZZZZ,SELL,2,12\n"), 1)
+        self.assertFalse(Holding.objects.filter(portfolio=self.portfolio).exists())
+
+
+class SymbolTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        symbols.reset()
+        self.addCleanup(symbols.reset)
+        self.user = User.objects.create_user("alice", password="pw")
+        self.client.force_login(self.user)
+
+    def test_prefix_search(self):
+        index = symbols.get_index()
+
+        self.assertEqual([r["ticker"] for r in index.search("aap")], ["AAPL"])
+        # Ticker matches come before company-name matches
+        tickers = [r["ticker"] for r in index.search("am", limit=50)]
+        self.assertEqual(tickers, ["AMAT", "AMD", "AMGN", "AMT", "AMZN", "AXP"])
+        self.assertIn("MSFT", [r["ticker"] for r in index.search("Micro")])
+        self.assertEqual(len(index.search("a", limit=3)), 3)
+        self.assertEqual(index.search("  "), [])
+        self.assertEqual(index.sector("msft"), "Information Technology")
+        self.assertEqual(index.sector("ZZZZ"), "Other")
+
+    def test_search_endpoint(self):
+        response = self.client.get("/api/symbols/", {"q": "MSF"})
+        self.assertEqual(response.json()["results"][0]["ticker"], "MSFT")
+
+    def test_index_picks_up_table_changes_on_recheck(self):
+        index = symbols.get_index()
+        Symbol.objects.create(ticker="ZZZZ", name="Zed Corp", exchange="NYSE", sector="Industrials")
+        self.assertIs(symbols.get_index(), index)
+
+        with mock.patch.object(symbols.time, "monotonic", return_value=symbols._checked_at + symbols.RECHECK_SECONDS):
+            self.assertIsNone(symbols.cached_index())
+            self.assertTrue(symbols.get_index().exists("ZZZZ"))
+
+    def test_trade_checks_unknown_symbol_upstream_once(self):
+        with mock.patch("core.market.fetch_history", return_value=pd.DataFrame({"Close": []})) as fetch:
+            response = self.client.post("/trade/", {"symbol": "zzzz", "shares": "1", "trade_type": "BUY"})
+            self.assertContains(response, "Unknown symbol: ZZZZ")
+            fetch.assert_called_once_with("ZZZZ", "5d")
+
+            # The miss is remembered; malformed tickers never go upstream
+            self.client.post("/trade/", {"symbol": "ZZZZ", "shares": "1", "trade_type": "BUY"})
+            self.assertEqual(self.client.get("/api/quote/", {"symbol": "ZZZZ"}).status_code, 404)
+            self.client.post("/trade/", {"symbol": "NOT A TICKER", "shares": "1", "trade_type": "BUY"})
+            fetch.assert_called_once()
+
+        self.assertFalse(Trade.objects.exists())
+
+    def test_trade_adds_listed_symbol_outside_master(self):
+        history = pd.DataFrame({"Close": [20.0]}, index=pd.to_datetime([date.today()]))
+
+        with mock.patch("core.market.fetch_history", return_value=history) as fetch:
+            response = self.client.post("/trade/", {"symbol": "ZZZZ", "shares": "2", "trade_type": "BUY"})
+            self.assertRedirects(response, "/", fetch_redirect_response=False)
+            self.assertTrue(symbols.get_index().exists("ZZZZ"))
+
+            # Known from now on: only the price fetch, no second check
+            fetch.reset_mock()
+            self.client.post("/trade/", {"symbol": "ZZZZ", "shares": "1", "trade_type": "BUY"})
+            fetch.assert_called_once_with("ZZZZ", "1d")
+
+        self.assertEqual(Holding.objects.get(portfolio=self.user.portfolio).shares, Decimal("3"))
+
+    def test_trade_sells_held_symbol_outside_master(self):
+        portfolio = self.user.portfolio
+        Holding.objects.create(portfolio=portfolio, symbol="ZZZZ", shares=Decimal("5"))
+        history = pd.DataFrame({"Close": [20.0]}, index=pd.to_datetime([date.today()]))
+
+        with mock.patch("core.market.fetch_history", return_value=history):
+            response = self.client.post("/trade/", {"symbol": "ZZZZ", "shares": "2", "trade_type": "SELL"})
+
+        self.assertRedirects(response, "/", fetch_redirect_response=False)
+        self.assertEqual(Holding.objects.get(portfolio=portfolio).shares, Decimal("3"))
+        portfolio.refresh_from_db()
+        self.assertEqual(portfolio.cash_balance, Decimal("100040"))
+
+
+    def test_migration_uppercases_existing_rows(self):
+        migration = importlib.import_module("core.migrations.0010_uppercase_symbols")
+        portfolio = self.user.portfolio
+        for symbol in ("aapl", "AAPL", " Aapl"):
+            Trade.objects.create(portfolio=portfolio, symbol=symbol, shares=1, price=10, trade_type="BUY")
+            Holding.objects.create(portfolio=portfolio, symbol=symbol, shares=Decimal("1.5"))
+        Holding.objects.create(portfolio=portfolio, symbol="msft", shares=Decimal("2"))
+        PriceBar.objects.create(symbol="AAPL", date=date(2026, 1, 2), close=10)
+        PriceBar.objects.create(symbol="aapl", date=date(2026, 1, 2), close=11)
+        PriceBar.objects.create(symbol="aapl", date=date(2026, 1, 5), close=12)
+
+        migration.uppercase_symbols(apps, None)
+
+        self.assertEqual(set(Trade.objects.values_list("symbol", flat=True)), {"AAPL"})
+        self.assertEqual(
+            dict(Holding.objects.values_list("symbol", "shares")),
+            {"AAPL": Decimal("4.5"), "MSFT": Decimal("2")},
+        )
+        self.assertEqual(
+            list(PriceBar.objects.order_by("date").values_list("symbol", "date", "close")),
+            [("AAPL", date(2026, 1, 2), Decimal("10")), ("AAPL", date(2026, 1, 5), Decimal("12"))],
+        )
+
+
+def _history(close, days=60):
+    index = pd.date_range(end=pd.Timestamp.today().normalize(), periods=days, freq="B")
+    return pd.DataFrame({"Close": [float(close)] * days, "Volume": [1000] * days}, index=index)
+
+
+class ViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        symbols.reset()
+        self.user = User.objects.create_user("alice", password="pw")
+        self.portfolio = self.user.portfolio
+        self.client.force_login(self.user)
+
+    def _fetch(self, prices):
+        # Fake market data: a flat history per symbol, empty when unpriced
+        return lambda symbol, period: _history(prices[symbol]) if symbol in prices else pd.DataFrame({"Close": []})
+
+    def test_home_values_holdings(self):
+        Holding.objects.create(portfolio=self.portfolio, symbol="AAPL", shares=Decimal("10"))
+        Trade.objects.create(portfolio=self.portfolio, symbol="AAPL", shares=10, price=100, trade_type="BUY")
+
+        with mock.patch("core.market.fetch_history", side_effect=self._fetch({"AAPL": 120})):
+            response = self.client.get("/", {"symbol": "aapl", "range": "3mo"})
+
+        self.assertEqual(response.status_code, 200)
+        row = response.context["holdings"][0]
+        self.assertEqual((row["symbol"], row["current_price"]), ("AAPL", Decimal("120.0")))
+        self.assertEqual(row["profit_loss"], Decimal("200"))
+        self.assertEqual(response.context["symbol"], "AAPL")
+        self.assertTrue(PortfolioSnapshot.objects.filter(user=self.user).exists())
+
+    def test_holding_without_quote_falls_back_to_stored_close(self):
+        for symbol in ("AAPL", "IBM", "MSFT"):
+            Holding.objects.create(portfolio=self.portfolio, symbol=symbol, shares=Decimal("2"))
+        PriceBar.objects.create(symbol="IBM", date=date.today() - timedelta(days=3), close=Decimal("50"))
+        PriceBar.objects.create(symbol="IBM", date=date.today() - timedelta(days=1), close=Decimal("55"))
+
+        with mock.patch("core.market.fetch_history", side_effect=self._fetch({"AAPL": 100})):
+            data = self.client.get("/api/portfolio/").json()
+            home = self.client.get("/")
+
+        prices = {h["symbol"]: float(h["current_price"]) for h in data["holdings"]}
+        self.assertEqual(prices, {"AAPL": 100.0, "IBM": 55.0})
+        self.assertEqual(data["unpriced"], ["MSFT"])
+        self.assertEqual(home.status_code, 200)
+        self.assertContains(home, "No price available for: MSFT")
+
+    def test_drawdown_reads_rollup_lows(self):
+        # A month, long since compacted, that dipped to half and recovered
+        SnapshotRollup.objects.create(user=self.user, period="M", start=date(2019, 3, 1),
+                                      open=100000, high=100000, low=50000, close=100000)
+
+        response = self.client.get("/", {"perf_range": "all"})
+
+        self.assertEqual(response.context["perf_tier"], "Monthly")
+        self.assertEqual(response.context["max_drawdown"], -50)
+        self.assertIn('"2019-03-31"', response.context["perf_dates"])
+
+    def test_trade_rejects_invalid_input_without_fetching(self):
+        bad = [
+            {"symbol": "AAPL", "shares": "", "trade_type": "BUY"},
+            {"symbol": "AAPL", "shares": "abc", "trade_type": "BUY"},
+            {"symbol": "AAPL", "shares": "-5", "trade_type": "BUY"},
+            {"symbol": "AAPL", "shares": "0", "trade_type": "BUY"},
+            {"symbol": "AAPL", "shares": "NaN", "trade_type": "BUY"},
+            {"symbol": "AAPL", "shares": "Infinity", "trade_type": "SELL"},
+            {"symbol": "AAPL", "shares": "1", "trade_type": "FOO"},
+            {"symbol": "AAPL", "shares": "1"},
+        ]
+        with mock.patch("core.market.fetch_history") as fetch:
+            for post in bad:
+                response = self.client.post("/trade/", post)
+                self.assertTemplateUsed(response, "trade_error.html")
+
+        fetch.assert_not_called()
+        self.assertFalse(Trade.objects.exists())
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.cash_balance, Decimal("100000"))
+
+    def test_buy_and_sell_update_cash_and_holdings(self):
+        with mock.patch("core.market.fetch_history", side_effect=self._fetch({"AAPL": 150})):
+            self.client.post("/trade/", {"symbol": "aapl", "shares": "10", "trade_type": "BUY"})
+            self.client.post("/trade/", {"symbol": "AAPL", "shares": "10", "trade_type": "SELL"})
+            response = self.client.post("/trade/", {"symbol": "AAPL", "shares": "1", "trade_type": "SELL"})
+
+        self.assertContains(response, "You do not have enough shares to sell.")
+        self.assertEqual(list(Trade.objects.values_list("trade_type", flat=True).order_by("id")), ["BUY", "SELL"])
+        self.assertFalse(Holding.objects.exists())
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.cash_balance, Decimal("100000"))
+
+    async def test_concurrent_buys_cannot_overspend(self):
+        # Each order costs 60% of the cash; both fetch their price before
+        # either writes, so only the atomic check stops the second one
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        order = {"symbol": "AAPL", "shares": "600", "trade_type": "BUY"}
+
+        with mock.patch("core.market.fetch_history", side_effect=self._fetch({"AAPL": 100})):
+            responses = await asyncio.gather(client.post("/trade/", order), client.post("/trade/", order))
+
+        self.assertEqual(sorted(r.status_code for r in responses), [200, 302])
+        self.assertEqual(await Trade.objects.acount(), 1)
+        portfolio = await Portfolio.objects.aget(pk=self.portfolio.pk)
+        self.assertEqual(portfolio.cash_balance, Decimal("40000"))
+        self.assertEqual((await Holding.objects.aget()).shares, Decimal("600"))
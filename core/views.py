@@ -1,40 +1,37 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
-from .models import Portfolio, PortfolioSnapshot, Trade, Holding
-from decimal import Decimal
+from django.db import connections, transaction
+from .models import Portfolio, PortfolioSnapshot, Trade, Holding, PriceBar
+from . import market, risk, snapshots, ledger, symbols
+from asgiref.sync import sync_to_async
+from decimal import Decimal, InvalidOperation
 from datetime import date, timedelta
-import yfinance as yf
 import math, json
 
-@login_required
-def home(request):
-    portfolio = Portfolio.objects.get(user=request.user)
-    holdings = Holding.objects.filter(portfolio=portfolio)
-
-    symbol = request.GET.get('symbol') or ''
-    range_option = request.GET.get('range', '1mo')
 
-    # -----------------------------
-    # 1. PORTFOLIO DASHBOARD LOGIC
-    # -----------------------------
+# -----------------------------
+# SHARED HELPERS
+# -----------------------------
+def _holdings_rows(holdings, trades, prices):
+    """
+    Value each holding against its latest price and its cost basis.
+    Holdings without any price are left out of the rows and the total.
+    """
     holdings_data = []
     total_value = Decimal("0")
 
-    for h in holdings:
-        stock = yf.Ticker(h.symbol)
-        data = stock.history(period="1d")
-
-        if data.empty and range_option == "1y":
-            data = stock.history(period="12mo")
-
-        current_price = Decimal(str(data["Close"].iloc[-1]))
+    for h, current_price in zip(holdings, prices):
+        if current_price is None:
+            continue
         market_value = current_price * h.shares
 
-        trades = Trade.objects.filter(portfolio=portfolio, symbol=h.symbol)
         total_shares = Decimal("0")
         total_cost = Decimal("0")
 
         for t in trades:
+            if t.symbol != h.symbol:
+                continue
             if t.trade_type == "BUY":
                 total_shares += t.shares
                 total_cost += t.shares * t.price
@@ -60,6 +57,132 @@ def home(request):
             "percent_gain": percent_gain,
         })
 
+    return holdings_data, total_value
+
+
+def _chart_series(data):
+    """Closes, volumes and moving averages for the stock lookup chart."""
+    series = {
+        "dates": [d.strftime("%Y-%m-%d") for d in data.index],
+        "closes": [float(c) for c in data['Close']],
+        "volumes": [int(v) for v in data['Volume']],
+        "sma20": [],
+        "sma50": [],
+        "sma150": [],
+        "sma200": [],
+        "volume_ma30": [],
+    }
+
+    # Volume MA30
+    volumes = series["volumes"]
+    for i in range(len(volumes)):
+        if i < 30:
+            series["volume_ma30"].append(None)
+        else:
+            window = volumes[i-30:i]
+            series["volume_ma30"].append(sum(window) / 30)
+
+    # Moving averages
+    for window in (20, 50, 150, 200):
+        target = series[f"sma{window}"]
+        for x in data['Close'].rolling(window=window).mean():
+            if x is None or (isinstance(x, float) and math.isnan(x)):
+                target.append(None)
+            else:
+                target.append(float(x))
+
+    return series
+
+
+async def _symbol_index():
+    # Lookups stay on the event loop; only a periodic recheck of the table
+    # goes to a thread
+    index = symbols.cached_index()
+    return index if index is not None else await sync_to_async(symbols.get_index)()
+
+
+async def _verify_symbol(symbol):
+    """
+    True if `symbol` is in the symbol master, or the market-data source
+    knows it. Master hits never leave the event loop; anything else costs
+    one upstream check, whose outcome symbols.record_check remembers.
+    """
+    if (await _symbol_index()).exists(symbol):
+        return True
+    if not symbols.valid_format(symbol) or await sync_to_async(symbols.known_missing)(symbol):
+        return False
+    found = not (await market.afetch_history(symbol, "5d")).empty
+    await sync_to_async(symbols.record_check)(symbol, found)
+    return found
+
+
+async def _holdings_histories(holdings, range_option="1d", extra=()):
+    """
+    Await the 1d history of every holding, plus any `extra` (symbol, period)
+    requests, in a single concurrent batch.
+    """
+    requests = [(h.symbol, "1d") for h in holdings] + list(extra)
+    results = await market.afetch_many(requests)
+    histories = results[:len(holdings)]
+
+    # Fall back to a year of data for holdings with no bar today
+    if range_option == "1y":
+        for i, h in enumerate(holdings):
+            if histories[i].empty:
+                histories[i] = await market.afetch_history(h.symbol, "12mo")
+
+    return histories, results[len(holdings):]
+
+
+async def _latest_prices(holdings, histories):
+    """
+    Latest close per holding, falling back to the last stored daily bar
+    when yfinance returns nothing. None when neither is available.
+    """
+    prices = []
+    for h, data in zip(holdings, histories):
+        if not data.empty:
+            prices.append(Decimal(str(data["Close"].iloc[-1])))
+        else:
+            prices.append(await PriceBar.objects.filter(symbol=h.symbol)
+                          .order_by("-date").values_list("close", flat=True).afirst())
+    return prices
+
+
+@login_required
+async def home(request):
+    user = await request.auser()
+    portfolio = await Portfolio.objects.aget(user=user)
+    holdings = [h async for h in Holding.objects.filter(portfolio=portfolio)]
+
+    symbol = symbols.normalize(request.GET.get('symbol'))
+    range_option = request.GET.get('range', '1mo')
+    perf_range = request.GET.get('perf_range', 'all')
+    if perf_range not in snapshots.RANGES:
+        perf_range = 'all'
+
+    symbol_error = None
+    if symbol and not await _verify_symbol(symbol):
+        symbol_error = f"Unknown symbol: {symbol}"
+        symbol = ''
+    index = await _symbol_index()
+
+    # -----------------------------
+    # 1. PORTFOLIO DASHBOARD LOGIC
+    # -----------------------------
+    # Holdings prices and the stock lookup are fetched concurrently
+    extra = [(symbol, range_option)] if symbol else []
+    histories, lookup = await _holdings_histories(holdings, range_option, extra)
+
+    # One query serves both the cost basis and the trade history table
+    trade_history = [
+        t async for t in Trade.objects.settled().filter(portfolio=portfolio).order_by('-timestamp')
+    ]
+
+    prices = await _latest_prices(holdings, histories)
+    holdings_data, total_value = _holdings_rows(holdings, trade_history, prices)
+    unpriced = [h.symbol for h, p in zip(holdings, prices) if p is None]
+
     total_portfolio_value = portfolio.cash_balance + total_value
     # -----------------------------
     # PORTFOLIO ALLOCATION (Step 9)
@@ -78,16 +201,22 @@ def home(request):
 
         allocation_labels.append(ticker)
         allocation_weights.append(round(weight, 2))  # now a float
-    
+
     allocation_labels_json = json.dumps(allocation_labels)
     allocation_weights_json = json.dumps(allocation_weights)
 
+    # Same weights grouped by sector from the symbol master
+    sector_weights = {}
+    for ticker, weight in zip(allocation_labels, allocation_weights):
+        sector = index.sector(ticker)
+        sector_weights[sector] = round(sector_weights.get(sector, 0) + weight, 2)
+
+    sector_labels_json = json.dumps(list(sector_weights))
+    sector_weights_json = json.dumps(list(sector_weights.values()))
+
     # -----------------------------
     # TRADE HISTORY (Step 10)
     # -----------------------------
-    # trade_history = Trade.objects.filter(user=request.user).order_by('-timestamp')
-    trade_history = Trade.objects.filter(portfolio=portfolio).order_by('-timestamp')
-
     trade_rows = []
     running_cost_basis = 0
     running_shares = 0
@@ -120,46 +249,45 @@ def home(request):
     # 1B. SAVE PORTFOLIO SNAPSHOT
     # -----------------------------
     today = date.today()
-    existing = PortfolioSnapshot.objects.filter(user=request.user, date=today).first()
+    existing = await PortfolioSnapshot.objects.filter(user=user, date=today).aexists()
 
     if not existing:
-        PortfolioSnapshot.objects.create(
-            user=request.user,
+        await PortfolioSnapshot.objects.acreate(
+            user=user,
             total_value=total_portfolio_value
         )
 
-    snapshots = PortfolioSnapshot.objects.filter(user=request.user).order_by("date")
-
-    # Performance chart data
-    perf_dates = [s.date.strftime("%Y-%m-%d") for s in snapshots]
-    perf_values = [float(s.total_value) for s in snapshots]
+    # Performance chart data, read from the daily/weekly/monthly tier that
+    # fits the requested window
+    dates, perf_values, perf_highs, perf_lows, perf_tier = await sync_to_async(
+        snapshots.performance_series
+    )(user, perf_range)
+    perf_dates = [d.strftime("%Y-%m-%d") for d in dates]
     # -----------------------------
     # DRAWDOWN CALCULATION (Step 8C)
     # -----------------------------
     drawdowns = []
     running_peak = float('-inf')
 
-    for v in perf_values:
+    # On the weekly/monthly tiers each point's trough is its period's low,
+    # and its high only counts as a peak for the periods after it
+    for v, high, low in zip(perf_values, perf_highs, perf_lows):
         if v > running_peak:
             running_peak = v
-        dd = ((v - running_peak) / running_peak) * 100  # negative %
+        dd = ((low - running_peak) / running_peak) * 100  # negative %
         drawdowns.append(round(dd))  # whole percentages
+        running_peak = max(running_peak, high)
 
     max_drawdown = min(drawdowns) if drawdowns else 0
 
     # -----------------------------
     # YTD RETURN
     # -----------------------------
-    today = date.today()
     year_start = date(today.year, 1, 1)
 
-    ytd_value_start = None
-    for snap in snapshots:
-        if snap.date >= year_start:
-            ytd_value_start = float(snap.total_value)
-            break
+    ytd_value_start = await sync_to_async(snapshots.value_on_or_after)(user, year_start)
 
-    if ytd_value_start:
+    if ytd_value_start and perf_values:
         ytd_return = round(((perf_values[-1] - ytd_value_start) / ytd_value_start) * 100)
     else:
         ytd_return = 0
@@ -169,21 +297,15 @@ def home(request):
     # -----------------------------
     one_year_ago = today - timedelta(days=365)
 
-    one_year_value_start = None
-    for snap in snapshots:
-        if snap.date >= one_year_ago:
-            one_year_value_start = float(snap.total_value)
-            break
+    one_year_value_start = await sync_to_async(snapshots.value_on_or_after)(user, one_year_ago)
 
-    if one_year_value_start:
+    if one_year_value_start and perf_values:
         one_year_return = round(((perf_values[-1] - one_year_value_start) / one_year_value_start) * 100)
     else:
         one_year_return = 0
 
-    # JSON for Chart.js
-    drawdowns_json = json.dumps(drawdowns)
     # -----------------------------
-    # 7‑DAY SMA
+    # 7‑PERIOD SMA (days, weeks or months by tier)
     # -----------------------------
     sma7 = []
     for i in range(len(perf_values)):
@@ -194,7 +316,7 @@ def home(request):
             sma7.append(sum(window) / 7)
 
     # -----------------------------
-    # 30‑DAY SMA
+    # 30‑PERIOD SMA
     # -----------------------------
     sma30 = []
     for i in range(len(perf_values)):
@@ -204,10 +326,18 @@ def home(request):
             window = perf_values[i-30:i]
             sma30.append(sum(window) / 30)
 
-    perf_dates_json = json.dumps(perf_dates)
-    perf_values_json = json.dumps(perf_values)
-    sma7_json = json.dumps(sma7)
-    sma30_json = json.dumps(sma30)
+    # -----------------------------
+    # DOWNSAMPLE TO THE POINT BUDGET
+    # -----------------------------
+    # Indicators are computed on the full tier first so they stay exact
+    keep = snapshots.lttb(perf_values)
+
+    # JSON for Chart.js
+    perf_dates_json = json.dumps([perf_dates[i] for i in keep])
+    perf_values_json = json.dumps([perf_values[i] for i in keep])
+    sma7_json = json.dumps([sma7[i] for i in keep])
+    sma30_json = json.dumps([sma30[i] for i in keep])
+    drawdowns_json = json.dumps([drawdowns[i] for i in keep])
 
     # -----------------------------------------
     # 2. STOCK LOOKUP + CHART LOGIC (Step 7A)
@@ -216,18 +346,14 @@ def home(request):
     timestamp = None
     change = None
 
-    chart_dates = []
-    closes = []
-    volumes = []
-    sma20 = []
-    sma50 = []
-    sma150 = []
-    sma200 = []
-    volume_ma30 = []
+    series = {
+        "dates": [], "closes": [], "volumes": [],
+        "sma20": [], "sma50": [], "sma150": [], "sma200": [],
+        "volume_ma30": [],
+    }
 
     if symbol:
-        stock = yf.Ticker(symbol)
-        data = stock.history(period=range_option)
+        data = lookup[0]
 
         if not data.empty:
             price = data['Close'].iloc[-1]
@@ -237,51 +363,19 @@ def home(request):
                 prev_close = data['Close'].iloc[-2]
                 change = price - prev_close
 
-            chart_dates = [d.strftime("%Y-%m-%d") for d in data.index]
-            closes = [float(c) for c in data['Close']]
-            volumes = [int(v) for v in data['Volume']]
-
-            # Volume MA30
-            for i in range(len(volumes)):
-                if i < 30:
-                    volume_ma30.append(None)
-                else:
-                    window = volumes[i-30:i]
-                    volume_ma30.append(sum(window) / 30)
-
-            # Moving averages
-            data['SMA20'] = data['Close'].rolling(window=20).mean()
-            data['SMA50'] = data['Close'].rolling(window=50).mean()
-            data['SMA150'] = data['Close'].rolling(window=150).mean()
-            data['SMA200'] = data['Close'].rolling(window=200).mean()
-
-            for col, target in [
-                ('SMA20', sma20),
-                ('SMA50', sma50),
-                ('SMA150', sma150),
-                ('SMA200', sma200),
-            ]:
-                for x in data[col]:
-                    if x is None or (isinstance(x, float) and math.isnan(x)):
-                        target.append(None)
-                    else:
-                        target.append(float(x))
+            series = _chart_series(data)
 
     # Convert stock chart lists to JSON
-    chart_dates = json.dumps(chart_dates)
-    closes = json.dumps(closes)
-    volumes = json.dumps(volumes)
-    sma20 = json.dumps(sma20)
-    sma50 = json.dumps(sma50)
-    sma150 = json.dumps(sma150)
-    sma200 = json.dumps(sma200)
-    volume_ma30 = json.dumps(volume_ma30)
-    
+    series = {key: json.dumps(values) for key, values in series.items()}
 
     # -----------------------------
     # 3. RENDER EVERYTHING
     # -----------------------------
     return render(request, "home.html", {
+        # Resolved asynchronously above, so the template never touches
+        # the lazy request.user from inside the event loop
+        "user": user,
+
         "portfolio": portfolio,
         "holdings": holdings_data,
         "total_value": total_value,
@@ -293,20 +387,25 @@ def home(request):
         "perf_values": perf_values_json,
         "perf_sma7": sma7_json,
         "perf_sma30": sma30_json,
+        "perf_range": perf_range,
+        "perf_ranges": list(snapshots.RANGES),
+        "perf_tier": {None: "Daily", "W": "Weekly", "M": "Monthly"}[perf_tier],
+        # SMAs run over points of the tier shown, not always over days
+        "perf_sma_unit": {None: "Day", "W": "Week", "M": "Month"}[perf_tier],
 
         # Stock lookup + chart
         "price": price,
         "symbol": symbol,
         "timestamp": timestamp,
         "change": change,
-        "dates": chart_dates,
-        "closes": closes,
-        "volumes": volumes,
-        "sma20": sma20,
-        "sma50": sma50,
-        "sma150": sma150,
-        "sma200": sma200,
-        "volume_ma30": volume_ma30,
+        "dates": series["dates"],
+        "closes": series["closes"],
+        "volumes": series["volumes"],
+        "sma20": series["sma20"],
+        "sma50": series["sma50"],
+        "sma150": series["sma150"],
+        "sma200": series["sma200"],
+        "volume_ma30": series["volume_ma30"],
         "range_option": range_option,
 
         "drawdowns": drawdowns_json,
@@ -316,73 +415,238 @@ def home(request):
 
         "allocation_labels": allocation_labels_json,
         "allocation_weights": allocation_weights_json,
+        "sector_labels": sector_labels_json,
+        "sector_weights": sector_weights_json,
+        "symbol_error": symbol_error,
 
         "trade_rows": trade_rows,
+        "unpriced": unpriced,
     })
 
+@transaction.atomic
+def _execute_trade(user, symbol, shares, trade_type, price):
+    """
+    Check and apply one trade against locked portfolio and holding rows, so
+    concurrent orders can't both spend the same cash or shares. Returns an
+    error message, or None once the trade is recorded.
+    """
+    portfolio = Portfolio.objects.select_for_update().get(user=user)
+    holding = Holding.objects.select_for_update().filter(portfolio=portfolio, symbol=symbol).first()
+
+    # BUY logic
+    if trade_type == "BUY":
+        cost = price * shares
+        if portfolio.cash_balance < cost:
+            return "Not enough cash to complete this trade."
+        portfolio.cash_balance -= cost
+
+        # Update holdings
+        if holding is None:
+            holding = Holding(portfolio=portfolio, symbol=symbol)
+        holding.shares += shares
+        holding.save()
+
+    # SELL logic
+    if trade_type == "SELL":
+        if not holding or holding.shares < shares:
+            return "You do not have enough shares to sell."
+        # Adds cash from the Sale
+        portfolio.cash_balance += price * shares
+        # Substracts shares
+        holding.shares -= shares
+        # Delete holdings if shares reaches zero
+        if holding.shares == 0:
+            holding.delete()
+        else:
+            holding.save()
+
+    # Save portfolio and trade
+    portfolio.save()
+    Trade.objects.create(
+        portfolio=portfolio,
+        symbol=symbol,
+        shares=shares,
+        price=price,
+        trade_type=trade_type
+    )
+    return None
+
+
 @login_required
-def trade(request):
+async def trade(request):
     if request.method == "POST":
-        symbol = request.POST.get("symbol")
-        shares = Decimal(request.POST.get("shares"))
+        symbol = symbols.normalize(request.POST.get("symbol"))
         trade_type = request.POST.get("trade_type")
 
-        # Get user portfolio
-        portfolio = Portfolio.objects.get(user=request.user)
+        # Same rules as ledger import, so every stored trade round-trips
+        if trade_type not in ("BUY", "SELL"):
+            return render(request, "trade_error.html", {
+                "message": "Trade type must be BUY or SELL."
+            })
+        try:
+            shares = Decimal(request.POST.get("shares") or "")
+            if not shares.is_finite():
+                raise InvalidOperation
+            shares = shares.quantize(Decimal("0.0001"))
+        except InvalidOperation:
+            shares = None
+        if shares is None or shares <= 0:
+            return render(request, "trade_error.html", {
+                "message": "Shares must be a positive number."
+            })
+
+        user = await request.auser()
+
+        # Positions in symbols the data source no longer knows can still be sold
+        held = trade_type == "SELL" and await Holding.objects.filter(
+            portfolio__user=user, symbol=symbol
+        ).aexists()
+        if not held and not await _verify_symbol(symbol):
+            return render(request, "trade_error.html", {
+                "message": f"Unknown symbol: {symbol or '(blank)'}"
+            })
 
         # Get current price
-        stock = yf.Ticker(symbol)
-        data = stock.history(period="1d")
+        data = await market.afetch_history(symbol, "1d")
+        if data.empty:
+            return render(request, "trade_error.html", {
+                "message": f"No current price available for {symbol}."
+            })
         price = Decimal(str(data['Close'].iloc[-1]))
 
-        # BUY logic
-        if trade_type == "BUY":
-            cost = price * shares
-            if portfolio.cash_balance < cost:
-                return render(request, "trade_error.html", {
-                    "message": "Not enough cash to complete this trade."
-                })
-            portfolio.cash_balance -= cost
-
-            # Update holdings
-            holding, created = Holding.objects.get_or_create(
-                portfolio=portfolio,
-                symbol=symbol
-            )
-            holding.shares += shares
-            holding.save()
-
-        # SELL logic
-        if trade_type == "SELL":
-            holding = Holding.objects.filter(
-                portfolio=portfolio,
-                symbol=symbol
-            ).first()
-
-            if not holding or holding.shares < shares:
-                return render(request, "trade_error.html", {
-                    "message": "You do not have enough shares to sell."
-                })
-        # Adds cash from the Sale
-            portfolio.cash_balance += price * shares
-        # Substracts shares
-            holding.shares -= shares
-        # - New logic added: delete holdings if shares reaches zero
-            if holding.shares == 0:
-                holding.delete()
-            else:
-                holding.save()
-
-        # Save portfolio and trade
-        portfolio.save()
-        Trade.objects.create(
-            portfolio=portfolio,
-            symbol=symbol,
-            shares=shares,
-            price=price,
-            trade_type=trade_type
-        )
+        message = await sync_to_async(_execute_trade)(user, symbol, shares, trade_type, price)
+        if message:
+            return render(request, "trade_error.html", {"message": message})
 
         return redirect("home")
 
-    return redirect("home")
\ No newline at end of file
+    return redirect("home")
+
+
+# -----------------------------
+# JSON DATA ENDPOINTS
+# -----------------------------
+@login_required
+async def portfolio_data(request):
+    user = await request.auser()
+    portfolio = await Portfolio.objects.aget(user=user)
+    holdings = [h async for h in Holding.objects.filter(portfolio=portfolio)]
+    trades = [t async for t in Trade.objects.settled().filter(portfolio=portfolio)]
+
+    histories, _ = await _holdings_histories(holdings)
+    prices = await _latest_prices(holdings, histories)
+    holdings_data, total_value = _holdings_rows(holdings, trades, prices)
+
+    return JsonResponse({
+        "cash_balance": float(portfolio.cash_balance),
+        "total_value": float(total_value),
+        "total_portfolio_value": float(portfolio.cash_balance + total_value),
+        "holdings": [
+            {key: (float(v) if isinstance(v, Decimal) else v) for key, v in row.items()}
+            for row in holdings_data
+        ],
+        "unpriced": [h.symbol for h, p in zip(holdings, prices) if p is None],
+    })
+
+
+@login_required
+async def quote_data(request):
+    symbol = symbols.normalize(request.GET.get('symbol'))
+    range_option = request.GET.get('range', '1mo')
+
+    if not symbol:
+        return JsonResponse({"error": "symbol is required"}, status=400)
+    if not await _verify_symbol(symbol):
+        return JsonResponse({"error": f"Unknown symbol: {symbol}"}, status=404)
+
+    data = await market.afetch_history(symbol, range_option)
+    if data.empty:
+        return JsonResponse({"error": f"No data for {symbol}"}, status=404)
+
+    closes = data['Close']
+    return JsonResponse({
+        "symbol": symbol,
+        "price": float(closes.iloc[-1]),
+        "change": float(closes.iloc[-1] - closes.iloc[-2]) if len(data) > 1 else None,
+        "timestamp": data.index[-1].isoformat(),
+        **_chart_series(data),
+    })
+
+
+@login_required
+async def risk_data(request):
+    user = await request.auser()
+    portfolio = await Portfolio.objects.aget(user=user)
+    held = [s async for s in Holding.objects.filter(portfolio=portfolio).values_list("symbol", flat=True)]
+
+    # Backfill daily closes: a year for new symbols, a month for stale ones
+    missing, stale = await sync_to_async(risk.stale_symbols)(held)
+    requests = [(s, "1y") for s in missing] + [(s, "1mo") for s in stale]
+    if requests:
+        histories = await market.afetch_many(requests)
+        for (s, _), data in zip(requests, histories):
+            added = await sync_to_async(risk.store_bars)(s, data) if not data.empty else 0
+            if not added:
+                # Nothing newer upstream: don't refetch on every load this session
+                await sync_to_async(risk.mark_checked)(s)
+
+    return JsonResponse(await sync_to_async(risk.portfolio_risk)(portfolio))
+
+
+# -----------------------------
+# BULK IMPORT / EXPORT
+# -----------------------------
+@login_required
+async def export_trades(request):
+    user = await request.auser()
+    portfolio = await Portfolio.objects.aget(user=user)
+    fmt = "jsonl" if request.GET.get("format") == "jsonl" else "csv"
+
+    response = StreamingHttpResponse(
+        ledger.export_lines(portfolio, fmt),
+        content_type="application/x-ndjson" if fmt == "jsonl" else "text/csv",
+    )
+    response["Content-Disposition"] = f'attachment; filename="trades.{fmt}"'
+    return response
+
+
+def _import_in_worker(portfolio, stream, fmt):
+    try:
+        return ledger.import_trades(portfolio, stream, fmt)
+    finally:
+        # Worker threads are reused; don't leave their connection open
+        connections.close_all()
+
+
+@login_required
+async def import_trades(request):
+    if request.method == "POST" and request.FILES.get("file"):
+        upload = request.FILES["file"]
+        fmt = request.POST.get("format")
+        if fmt not in ("csv", "jsonl"):
+            fmt = "jsonl" if upload.name.endswith((".jsonl", ".ndjson")) else "csv"
+
+        user = await request.auser()
+        portfolio = await Portfolio.objects.aget(user=user)
+
+        try:
+            # A large import holds its thread for minutes, so keep it off the
+            # shared thread every other request's ORM calls run on. The
+            # ledger reads the upload line by line, twice.
+            await sync_to_async(_import_in_worker, thread_sensitive=False)(portfolio, upload.file, fmt)
+        except ledger.LedgerError as e:
+            return render(request, "trade_error.html", {
+                "message": f"Import failed: {e}"
+            })
+
+    return redirect("home")
+
+
+@login_required
+async def symbol_search(request):
+    index = await _symbol_index()
+    try:
+        limit = min(int(request.GET.get("limit", 10)), 50)
+    except ValueError:
+        limit = 10
+    return JsonResponse({"results": index.search(request.GET.get("q", ""), limit)})
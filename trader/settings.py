@@ -117,3 +117,9 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Market data
+# Worker threads shared by all concurrent (blocking) yfinance fetches
+
+MARKET_DATA_WORKERS = 32
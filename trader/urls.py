@@ -25,6 +25,14 @@ urlpatterns = [
     # Home + Trade
     path('', views.home, name='home'),
     path('trade/', views.trade, name='trade'),
+    path('trades/import/', views.import_trades, name='import_trades'),
+    path('trades/export/', views.export_trades, name='export_trades'),
+
+    # JSON data
+    path('api/portfolio/', views.portfolio_data, name='portfolio_data'),
+    path('api/quote/', views.quote_data, name='quote_data'),
+    path('api/risk/', views.risk_data, name='risk_data'),
+    path('api/symbols/', views.symbol_search, name='symbol_search'),
 
     # Authentication
     path('accounts/login/', auth_views.LoginView.as_view(template_name='login.html'), name='login'),